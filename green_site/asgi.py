@@ -3,6 +3,15 @@ ASGI config for green_site project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The public read views (home, post detail, event list and detail) are async
+and run without a thread per connection under an ASGI server, e.g.::
+
+    uvicorn green_site.asgi:application --workers 2
+
+The project's middleware is async-capable, so requests stay on the event
+loop on their way to the view. ``manage.py bench_http`` compares it
+against the WSGI deployment.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -42,7 +42,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'greentech.middleware.RequestLogMiddleware',
+    'greentech.middleware.QueryCountMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'greentech.middleware.StaticFilesMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -74,13 +78,121 @@ WSGI_APPLICATION = 'green_site.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
+# Configured from the environment:
+#   DB_ENGINE          sqlite (default) or postgresql
+#   DB_NAME            database name, or the file path for SQLite
+#   DB_USER, DB_PASSWORD, DB_HOST, DB_PORT   PostgreSQL only
+#   DB_CONN_MAX_AGE    seconds to keep connections open between requests
+#   DB_POOL_MAX_SIZE   PostgreSQL only: use psycopg's connection pool
+#                      (needs psycopg[pool]) instead of persistent connections
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    _db_pool_size = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'greentech'),
+            'USER': os.environ.get('DB_USER', ''),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', ''),
+            'PORT': os.environ.get('DB_PORT', ''),
+            # Pooled connections are returned to the pool after each
+            # request, so they must not also be persistent.
+            'CONN_MAX_AGE': 0 if _db_pool_size else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {'min_size': 2, 'max_size': _db_pool_size} if _db_pool_size else False,
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    # DB_SQLITE_TUNING=0 falls back to SQLite's defaults, e.g. to compare
+    # against them with `manage.py bench_db_writes`.
+    if os.environ.get('DB_SQLITE_TUNING', '1') == '1':
+        DATABASES['default']['OPTIONS'] = {
+            # WAL lets readers carry on while one writer commits;
+            # synchronous=NORMAL is durable in WAL mode apart from the last
+            # transactions on power loss. Writers wait up to `timeout`
+            # seconds for the lock instead of failing, and IMMEDIATE takes
+            # the write lock when a transaction starts so it cannot deadlock
+            # upgrading from a read lock.
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000;'
+            ),
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# GREENTECH_CACHE selects the backend: "locmem" (default), "file" or "redis".
+# GREENTECH_CACHE_LOCATION overrides the directory or Redis URL.
+
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'greentech'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+_cache_backend, _cache_location = CACHE_BACKENDS[os.environ.get('GREENTECH_CACHE', 'locmem')]
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': _cache_backend,
+        'LOCATION': os.environ.get('GREENTECH_CACHE_LOCATION', _cache_location),
     }
 }
 
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# GREENTECH_SESSIONS selects where sessions live: "db", "cache" (read from
+# the cache, written through to the database) or "cookie" (signed cookies,
+# no server-side storage, but a session cannot be revoked before it
+# expires). "cache" needs a cache shared by all processes, so it is the
+# default only with Redis.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cache': 'django.contrib.sessions.backends.cached_db',
+    'cookie': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get(
+    'GREENTECH_SESSIONS', 'cache' if _cache_backend.endswith('RedisCache') else 'db'
+)]
+
+# Home page views are counted in the cache and added to the database at
+# most once per this many seconds per process.
+GREENTECH_VISIT_FLUSH_INTERVAL = int(os.environ.get('GREENTECH_VISIT_FLUSH_INTERVAL', 60))
+
+# Rate limits for the public forms, per client IP (per user where the form
+# needs a login), e.g. {'signup': '3/m', 'contact': None}; None turns a
+# limit off. See greentech.ratelimit.DEFAULT_RATES for the scopes.
+GREENTECH_RATELIMITS = {}
+
+# Number of reverse proxies in front of the site that append to
+# X-Forwarded-For. 0 (default) uses REMOTE_ADDR as the client address.
+GREENTECH_TRUSTED_PROXIES = int(os.environ.get('GREENTECH_TRUSTED_PROXIES', 0))
+
+# Seconds anonymous pages are served from the cache (0 disables it).
+GREENTECH_PAGE_CACHE_TIMEOUT = int(os.environ.get('GREENTECH_PAGE_CACHE_TIMEOUT', 300))
+
+# Identifies the deployed code (e.g. the git commit). It is part of the
+# post and event ETags, so changing it on deploy makes browsers fetch pages
+# rendered with the new templates instead of getting a 304.
+GREENTECH_RELEASE = os.environ.get('GREENTECH_RELEASE', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -122,15 +234,94 @@ STATICFILES_DIRS = [
     BASE_DIR / "static"
 ]
 
+# Production static build: `manage.py collectstatic` minifies our CSS, gives
+# every file a content-hashed name and writes .gz/.br siblings (.br needs
+# the optional `brotli` package). StaticFilesMiddleware then serves them
+# from STATIC_ROOT with immutable caching. In development runserver serves
+# the unprocessed files; set GREENTECH_STATIC_BUILD=1 to use the build.
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+GREENTECH_STATIC_BUILD = os.environ.get('GREENTECH_STATIC_BUILD', '0' if DEBUG else '1') == '1'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'greentech.staticfiles.CompressedManifestStaticFilesStorage' if GREENTECH_STATIC_BUILD
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Number of slowest SQL statements QueryCountMiddleware reports per request
+# in the Server-Timing header (DEBUG only).
+GREENTECH_SLOW_QUERY_COUNT = 3
+
+# Request log: RequestLogMiddleware writes one JSON line per logged request
+# to the greentech.requests logger, and `manage.py request_log_report`
+# turns the lines into per-view percentiles. A GREENTECH_REQUEST_LOG_SAMPLE
+# fraction of requests is logged, plus every request slower than
+# GREENTECH_SLOW_REQUEST_MS with its first GREENTECH_REQUEST_LOG_SQL SQL
+# statements and a stack profile. Setting both to 0 turns the log off.
+# Lines go to stderr, or to GREENTECH_REQUEST_LOG_FILE when it is set.
+GREENTECH_REQUEST_LOG_SAMPLE = float(os.environ.get('GREENTECH_REQUEST_LOG_SAMPLE', 0.1))
+GREENTECH_SLOW_REQUEST_MS = int(os.environ.get('GREENTECH_SLOW_REQUEST_MS', 500))
+GREENTECH_REQUEST_LOG_SQL = 100
+GREENTECH_REQUEST_LOG_FILE = os.environ.get('GREENTECH_REQUEST_LOG_FILE', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'request_log': {
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': GREENTECH_REQUEST_LOG_FILE,
+            'formatter': 'message',
+        } if GREENTECH_REQUEST_LOG_FILE else {
+            'class': 'logging.StreamHandler',
+            'formatter': 'message',
+        },
+    },
+    'loggers': {
+        'greentech.requests': {
+            'handlers': ['request_log'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Full-text search backend for posts (dotted path). Leave as None to use the
+# SQLite FTS5 index on SQLite and a plain icontains scan elsewhere.
+GREENTECH_SEARCH_BACKEND = None
+
+# Run background jobs in-process after commit instead of waiting for
+# `manage.py run_worker`. Convenient for development, slow for production.
+GREENTECH_TASKS_EAGER = os.environ.get('GREENTECH_TASKS_EAGER', '') == '1'
+
+# Staff notification emails are sent by the worker. The console backend
+# prints them until real SMTP settings are provided.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'GreenTech <noreply@greentech.local>')
+
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
 LOGIN_URL = 'login'
 
 
+# Formats generated for post image variants, best first. JPEG is always
+# produced as the fallback; add 'avif' where the Pillow build supports it.
+GREENTECH_IMAGE_FORMATS = ('webp', 'jpeg')
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
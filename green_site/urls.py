@@ -15,12 +15,17 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
+from django.contrib.auth.views import LoginView
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from greentech.ratelimit import ratelimit
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('greentech.urls')),
+    # Throttled like the login page; the rest of auth.urls is unchanged.
+    path('accounts/login/', ratelimit('login')(LoginView.as_view())),
     path('accounts/', include('django.contrib.auth.urls')),  # Login, logout, password reset
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
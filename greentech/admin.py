@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import GreenPost, ContactMessage, Feedback, VolunteerApplication, Suggestion, ReportIssue, \
-    VolunteerRequest, Event
+    VolunteerRequest, Event, Job, ModerationLog
 
 admin.site.register(GreenPost)
 admin.site.register(ContactMessage)
@@ -15,4 +15,16 @@ admin.site.register(Event)
 class VolunteerRequestAdmin(admin.ModelAdmin):
     list_display  = ('name', 'email', 'phone_number', 'area_of_interest', 'availability', 'created_at')
     list_filter   = ('area_of_interest', 'created_at')
-    search_fields = ('name', 'email', 'area_of_interest')
\ No newline at end of file
+    search_fields = ('name', 'email', 'area_of_interest')
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display  = ('task', 'status', 'attempts', 'run_at', 'created_at', 'finished_at')
+    list_filter   = ('status', 'task')
+
+
+@admin.register(ModerationLog)
+class ModerationLogAdmin(admin.ModelAdmin):
+    list_display  = ('kind', 'object_id', 'old_status', 'new_status', 'moderator', 'created_at')
+    list_filter   = ('kind', 'new_status')
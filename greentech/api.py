@@ -0,0 +1,200 @@
+"""
+Read-only JSON API, version 1, over posts, events and post feedback.
+
+Each resource declares its output fields and what the query needs for
+each one. Clients may ask for a subset with ``?fields=id,title,author``;
+only the columns, joins, annotations and prefetches for those fields are
+queried. Lists use the same keyset cursors as the HTML pages
+(``?cursor=``), with ``?limit=`` rows per page.
+
+Responses carry an ETag over the body. Anonymous responses go through the
+page cache, so a repeated request is answered, or given a 304, without
+touching the database.
+"""
+import hashlib
+
+from django.db.models import Prefetch
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from .models import Event, Feedback, GreenPost
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Feedback entries included per post by the ``recent_feedback`` field
+RECENT_FEEDBACK = 3
+
+
+class Field:
+    """Reads one output field; ``only``, ``select``, ``prefetch`` and ``annotate`` are what the query needs."""
+
+    def __init__(self, get, only=(), select=(), prefetch=(), annotate=None):
+        self.get = get
+        self.only = list(only)
+        self.select = list(select)
+        self.prefetch = list(prefetch)
+        self.annotate = annotate or {}
+
+
+def column(name):
+    return Field(lambda obj: getattr(obj, name), only=[name])
+
+
+def username(relation):
+    def get(obj):
+        user = getattr(obj, relation)
+        return user.username if user else None
+    return Field(get, only=[f'{relation}__username'], select=[relation])
+
+
+class Resource:
+    model = None
+    # Keyset ordering for lists; must end in pk.
+    ordering = ['-pk']
+    fields = {}
+    cache_tags = ()
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def filter(self, queryset, params):
+        """Apply list filters from the query string. Raise ValueError for bad input."""
+        return queryset
+
+    def parse_fields(self, value):
+        if not value:
+            return list(self.fields)
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValueError(
+                f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.fields)}."
+            )
+        return list(dict.fromkeys(names))
+
+    def queryset(self, names):
+        """The queryset for ``names``, loading nothing they do not use."""
+        only = {name.lstrip('-') for name in self.ordering}
+        select, prefetch, annotate = [], [], {}
+        for name in names:
+            field = self.fields[name]
+            only.update(field.only)
+            select += field.select
+            prefetch += field.prefetch
+            annotate.update(field.annotate)
+        only.discard('pk')
+        queryset = self.get_queryset().only('pk', *only)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if annotate:
+            queryset = queryset.annotate(**annotate)
+        return queryset
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name].get(obj) for name in names}
+
+
+def _recent_feedback(post):
+    return [
+        {'id': fb.pk, 'author': fb.user.username, 'feedback': fb.feedback, 'created_at': fb.created_at}
+        for fb in post.recent_feedback
+    ]
+
+
+class PostResource(Resource):
+    model = GreenPost
+    ordering = ['-created_at', '-pk']
+    cache_tags = ['posts']
+    fields = {
+        'id': Field(lambda post: post.pk),
+        'url': Field(lambda post: reverse('post_detail', args=[post.pk])),
+        'title': column('title'),
+        'content': column('content'),
+        'author': username('author'),
+        'image': Field(lambda post: post.image.url if post.image else None, only=['image']),
+        'created_at': column('created_at'),
+        'feedback_count': column('feedback_count'),
+        'last_feedback_at': column('last_feedback_at'),
+        'recent_feedback': Field(_recent_feedback, prefetch=[Prefetch(
+            'feedbacks',
+            queryset=Feedback.objects.select_related('user')
+            .only('feedback', 'created_at', 'post_id', 'user__username')
+            .order_by('-created_at', '-pk')[:RECENT_FEEDBACK],
+            to_attr='recent_feedback',
+        )]),
+    }
+
+
+class EventResource(Resource):
+    model = Event
+    ordering = ['date', 'pk']
+    cache_tags = ['events']
+    fields = {
+        'id': Field(lambda event: event.pk),
+        'url': Field(lambda event: reverse('event_detail', args=[event.pk])),
+        'title': column('title'),
+        'description': column('description'),
+        'date': column('date'),
+        'location': column('location'),
+        'created_by': username('created_by'),
+        'created_at': column('created_at'),
+        'updated_at': column('updated_at'),
+    }
+
+
+class FeedbackResource(Resource):
+    """Feedback left on posts. General site feedback is staff-only and not exposed."""
+    model = Feedback
+    ordering = ['-created_at', '-pk']
+    # Feedback changes invalidate their post, and with it the posts tag.
+    cache_tags = ['posts']
+    fields = {
+        'id': Field(lambda fb: fb.pk),
+        'post': Field(lambda fb: fb.post_id, only=['post']),
+        'author': username('user'),
+        'feedback': column('feedback'),
+        'created_at': column('created_at'),
+    }
+
+    def get_queryset(self):
+        return super().get_queryset().filter(post__isnull=False)
+
+    def filter(self, queryset, params):
+        post = params.get('post')
+        if post is None:
+            return queryset
+        if not post.isdigit():
+            raise ValueError("post must be a post id.")
+        return queryset.filter(post_id=int(post))
+
+
+RESOURCES = {
+    'posts': PostResource(),
+    'events': EventResource(),
+    'feedback': FeedbackResource(),
+}
+
+
+def parse_limit(value):
+    if value is None:
+        return DEFAULT_LIMIT
+    if not value.isdigit() or not 1 <= int(value) <= MAX_LIMIT:
+        raise ValueError(f"limit must be a number from 1 to {MAX_LIMIT}.")
+    return int(value)
+
+
+def json_response(request, data):
+    """JsonResponse with an ETag over its body, or a 304 if the client has it."""
+    response = JsonResponse(data)
+    response['ETag'] = quote_etag(hashlib.md5(response.content).hexdigest())
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(request, etag=response['ETag'], response=response) or response
+
+
+def error_response(message, status):
+    return JsonResponse({'error': message}, status=status)
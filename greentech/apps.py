@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class GreentechConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'greentech'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,343 @@
+"""
+Benchmark data and a route-by-route benchmark harness.
+
+``generate`` fills the tables to a given size and creates one user per
+persona. ``run_benchmark`` requests every page in ``greentech/urls.py`` as
+each persona, either in-process through the test client or over HTTP
+against a running server, and returns a report that ``manage.py
+bench_routes`` stores as JSON so runs on different commits can be compared.
+"""
+import random
+import statistics
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .counters import backfill_feedback_stats, get_counts, reconcile
+from .middleware import QueryStats
+from .models import (
+    GreenPost, ContactMessage, Feedback,
+    VolunteerRequest, ReportIssue, Event, VolunteerApplication
+)
+from .search import get_backend
+
+PASSWORD = 'bench-password'
+
+DEFAULT_SIZES = {
+    'users': 1000,
+    'posts': 5000,
+    'feedback': 20000,
+    'events': 500,
+    'applications': 5000,
+    'messages': 2000,
+    'issues': 500,
+}
+
+PERSONAS = {
+    'anonymous': None,
+    'volunteer': 'bench_volunteer',
+    'staff': 'bench_staff',
+}
+
+# Routes that are not benchmarked, and why. Everything else in urls.py
+# must appear in ``targets``; a test keeps the two lists in step.
+SKIPPED = {
+    'login': "greentech/login.html does not exist",
+    'logout': "ends the session",
+    'delete_post': "POST only, changes data",
+    'delete_feedback': "POST only, changes data",
+    'delete_user': "POST only, changes data",
+    'accept_volunteer': "POST only, changes data",
+    'deny_volunteer': "POST only, changes data",
+    'bulk_moderate_volunteers': "POST only, changes data",
+    'accept_event_volunteer': "POST only, changes data",
+    'deny_event_volunteer': "POST only, changes data",
+    'bulk_moderate_event_volunteers': "POST only, changes data",
+}
+
+
+def _batched_create(model, objs, batch_size=2000):
+    for start in range(0, len(objs), batch_size):
+        model.objects.bulk_create(objs[start:start + batch_size])
+
+
+def generate(sizes=None, seed=0):
+    """
+    Add ``sizes`` rows to the tables (see DEFAULT_SIZES) plus the persona
+    users, and return the row counts afterwards. Safe to run repeatedly.
+    """
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    rng = random.Random(seed)
+    run = f'{seed}-{int(time.time())}'
+    today = timezone.localdate()
+
+    hashed = make_password(PASSWORD)
+    for persona, username in PERSONAS.items():
+        if username and not User.objects.filter(username=username).exists():
+            User.objects.create(
+                username=username, email=f'{username}@example.com', password=hashed,
+                is_staff=persona == 'staff',
+            )
+    volunteer = User.objects.get(username=PERSONAS['volunteer'])
+    VolunteerRequest.objects.get_or_create(user=volunteer, defaults={
+        'name': 'Bench Volunteer', 'email': volunteer.email, 'phone_number': '555',
+        'area_of_interest': 'Trees', 'availability': 'Weekends', 'status': 'A',
+    })
+
+    _batched_create(User, [
+        User(username=f'bench-{run}-{i}', email=f'user{i}@example.com', password='!')
+        for i in range(sizes['users'])
+    ])
+    users = list(User.objects.values_list('pk', flat=True))
+    new_users = User.objects.filter(username__startswith=f'bench-{run}-').values_list('pk', flat=True)
+    _batched_create(VolunteerRequest, [
+        VolunteerRequest(
+            user_id=pk, name=f'Volunteer {pk}', email=f'user{pk}@example.com', phone_number='555',
+            area_of_interest=rng.choice(['Trees', 'Solar', 'Recycling']), availability='Weekends',
+            status=rng.choice('PAD'),
+        )
+        for pk in list(new_users)[::3]
+    ])
+
+    words = ['solar', 'compost', 'recycling', 'trees', 'water', 'bikes', 'gardens', 'energy']
+    _batched_create(GreenPost, [
+        GreenPost(
+            title=f"{rng.choice(words).title()} {rng.choice(words)} #{i}",
+            content=' '.join(rng.choice(words) for _ in range(80)),
+            author_id=rng.choice(users),
+        )
+        for i in range(sizes['posts'])
+    ])
+    posts = list(GreenPost.objects.values_list('pk', flat=True))
+    if posts:
+        _batched_create(Feedback, [
+            Feedback(user_id=rng.choice(users), post_id=rng.choice(posts), feedback='Great idea!')
+            for _ in range(sizes['feedback'])
+        ])
+        backfill_feedback_stats()
+
+    _batched_create(Event, [
+        Event(
+            title=f"{rng.choice(words).title()} day #{i}", description='Bring gloves.',
+            date=today + timedelta(days=rng.randint(-365, 365)), location='Town park',
+            created_by_id=rng.choice(users),
+        )
+        for i in range(sizes['events'])
+    ])
+    events = list(Event.objects.values_list('pk', flat=True))
+    if events:
+        taken = set(VolunteerApplication.objects.values_list('user_id', 'event_id'))
+        applications = []
+        for _ in range(sizes['applications'] * 2):
+            pair = (rng.choice(users), rng.choice(events))
+            if pair not in taken:
+                taken.add(pair)
+                applications.append(VolunteerApplication(
+                    user_id=pair[0], event_id=pair[1], name=f'Volunteer {pair[0]}',
+                    email='volunteer@example.com', motivation='Happy to help.',
+                    status=rng.choice('PAD'),
+                ))
+            if len(applications) == sizes['applications']:
+                break
+        _batched_create(VolunteerApplication, applications)
+
+    _batched_create(ContactMessage, [
+        ContactMessage(name=f'Sender {i}', email='sender@example.com', message='Hello there!')
+        for i in range(sizes['messages'])
+    ])
+    _batched_create(ReportIssue, [
+        ReportIssue(name=f'Reporter {i}', issue='Overflowing bins on Main Street.')
+        for i in range(sizes['issues'])
+    ])
+
+    get_backend().rebuild()
+    cache.clear()
+    return reconcile()
+
+
+def targets():
+    """(route name, persona, path) for every benchmarked page."""
+    post = GreenPost.objects.order_by('-created_at', '-pk').first()
+    event = Event.objects.order_by('-date', '-pk').first()
+    feedback = Feedback.objects.filter(post__isnull=False).order_by('-pk').first()
+    if post is None or event is None or feedback is None:
+        raise LookupError("Generate benchmark data first (manage.py generate_data).")
+    return [
+        ('home', 'anonymous', reverse('home')),
+        ('home', 'anonymous', reverse('home') + '?q=solar'),
+        ('post_detail', 'anonymous', reverse('post_detail', args=[post.pk])),
+        ('about', 'anonymous', reverse('about')),
+        ('signup', 'anonymous', reverse('signup')),
+        ('report_issue', 'anonymous', reverse('report_issue')),
+        ('event_list', 'anonymous', reverse('event_list')),
+        ('event_list', 'anonymous', reverse('event_list') + f'?year={event.date.year}'),
+        ('event_calendar', 'anonymous', reverse('event_calendar')),
+        ('event_detail', 'anonymous', reverse('event_detail', args=[event.pk])),
+        ('api_post_list', 'anonymous', reverse('api_post_list')),
+        ('api_post_list', 'anonymous', reverse('api_post_list') + '?fields=id,title,created_at'),
+        ('api_post_detail', 'anonymous', reverse('api_post_detail', args=[post.pk])),
+        ('api_event_list', 'anonymous', reverse('api_event_list')),
+        ('api_event_detail', 'anonymous', reverse('api_event_detail', args=[event.pk])),
+        ('api_feedback_list', 'anonymous', reverse('api_feedback_list') + f'?post={post.pk}'),
+        ('api_feedback_detail', 'anonymous', reverse('api_feedback_detail', args=[feedback.pk])),
+        ('home', 'volunteer', reverse('home')),
+        ('post_detail', 'volunteer', reverse('post_detail', args=[post.pk])),
+        ('add_post', 'volunteer', reverse('add_post')),
+        ('contact', 'volunteer', reverse('contact')),
+        ('feedback', 'volunteer', reverse('feedback')),
+        ('volunteer', 'volunteer', reverse('volunteer')),
+        ('event_list', 'volunteer', reverse('event_list')),
+        ('event_detail', 'volunteer', reverse('event_detail', args=[event.pk])),
+        ('apply_volunteer', 'volunteer', reverse('apply_volunteer') + f'?event={event.pk}'),
+        ('add_event', 'staff', reverse('add_event')),
+        ('dashboard', 'staff', reverse('dashboard')),
+        ('admin_post_list', 'staff', reverse('admin_post_list')),
+        ('contact_messages', 'staff', reverse('contact_messages')),
+        ('export', 'staff', reverse('export', kwargs={'name': 'contacts', 'fmt': 'csv'})),
+        ('feedback_list', 'staff', reverse('feedback_list')),
+        ('volunteer_requests', 'staff', reverse('volunteer_requests')),
+        ('user_list', 'staff', reverse('user_list')),
+        ('admin_event_list', 'staff', reverse('admin_event_list')),
+    ]
+
+
+def _summary(latencies, elapsed):
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+
+class ClientRunner:
+    """Requests pages in-process through django.test.Client, one at a time."""
+    mode = 'client'
+
+    def __init__(self):
+        # Any host ALLOWED_HOSTS accepts; with DEBUG and an empty list
+        # Django accepts localhost.
+        hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+        host = hosts[0] if hosts else 'localhost'
+        self.clients = {}
+        for persona, username in PERSONAS.items():
+            client = Client(HTTP_HOST=host)
+            if username:
+                client.force_login(User.objects.get(username=username))
+            self.clients[persona] = client
+
+    def measure(self, persona, path, requests, concurrency=1):
+        client = self.clients[persona]
+        client.get(path)  # warm-up
+        latencies, queries = [], []
+        started = time.perf_counter()
+        for _ in range(requests):
+            # Counted here rather than by the middleware so that queries
+            # made while a streaming response is consumed are included.
+            stats = QueryStats(keep_slowest=0)
+            with connection.execute_wrapper(stats):
+                start = time.perf_counter()
+                response = client.get(path)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                latencies.append(time.perf_counter() - start)
+            queries.append(stats.count)
+        elapsed = time.perf_counter() - started
+        return response.status_code, latencies, elapsed, max(queries)
+
+
+class ServerRunner:
+    """
+    Requests pages over HTTP from a running server that shares this
+    process's database and session settings (logins are made by creating
+    sessions directly). Query counts come from the Server-Timing header,
+    which the server only sends with DEBUG on.
+    """
+    mode = 'server'
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = {}
+        for persona, username in PERSONAS.items():
+            self.cookies[persona] = None
+            if username:
+                client = Client()
+                client.force_login(User.objects.get(username=username))
+                self.cookies[persona] = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def _get(self, persona, path):
+        request = urllib.request.Request(self.base_url + path)
+        if self.cookies[persona]:
+            request.add_header('Cookie', f'{settings.SESSION_COOKIE_NAME}={self.cookies[persona]}')
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                status, timing = response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as e:
+            status, timing = e.code, e.headers.get('Server-Timing', '')
+        elapsed = time.perf_counter() - start
+        queries = None
+        for metric in timing.split(','):
+            if metric.strip().startswith('db;') and 'queries' in metric:
+                queries = int(metric.split('desc="')[1].split()[0])
+        return status, elapsed, queries
+
+    def measure(self, persona, path, requests, concurrency=1):
+        self._get(persona, path)  # warm-up
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(pool.map(lambda _: self._get(persona, path), range(requests)))
+        elapsed = time.perf_counter() - started
+        counts = [queries for _, _, queries in results if queries is not None]
+        return results[-1][0], [latency for _, latency, _ in results], elapsed, max(counts, default=None)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(runner, requests=50, concurrency=1, only=None):
+    """Measure every target and return the JSON-serializable report."""
+    routes = []
+    for name, persona, path in targets():
+        if only and name not in only:
+            continue
+        status, latencies, elapsed, queries = runner.measure(persona, path, requests, concurrency)
+        routes.append({
+            'route': name, 'persona': persona, 'path': path, 'status': status,
+            'queries': queries, **_summary(latencies, elapsed),
+        })
+    return {
+        'commit': git_commit(),
+        'created': timezone.now().isoformat(timespec='seconds'),
+        'mode': runner.mode,
+        'concurrency': concurrency,
+        'database': connection.vendor,
+        'rows': get_counts(),
+        'routes': routes,
+    }
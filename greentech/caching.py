@@ -0,0 +1,222 @@
+"""
+Page and fragment caching for the public pages.
+
+Cached pages are tagged (e.g. ``posts``, ``post:12``). Every tag has a
+version token stored in the cache and included in the page key, so saving
+or deleting a post only has to replace that post's tokens; pages built
+from the old tokens are never read again and simply expire.
+"""
+import hashlib
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .middleware import aget_user
+
+TAG_PREFIX = 'greentech:tag:'
+PAGE_PREFIX = 'greentech:page:'
+
+# Response headers kept with a cached page and sent again on a hit.
+PAGE_HEADERS = ('ETag', 'Last-Modified', 'Cache-Control', 'Vary')
+
+
+def _tag_key(tag):
+    return TAG_PREFIX + tag
+
+
+def get_tag_versions(tags):
+    """Return a version token per tag, creating missing ones."""
+    keys = [_tag_key(tag) for tag in tags]
+    found = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+async def aget_tag_versions(tags):
+    keys = [_tag_key(tag) for tag in tags]
+    found = await cache.aget_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        await cache.aset_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    cache.set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, None)
+
+
+def invalidate_post(post_id):
+    invalidate_tags('posts', f'post:{post_id}')
+    cache.delete(make_template_fragment_key('post_card', [post_id]))
+
+
+def invalidate_event(event_id):
+    invalidate_tags('events', f'event:{event_id}')
+
+
+class CachedPageMixin:
+    """
+    Serve whole pages from the cache to anonymous visitors.
+
+    Subclasses list the tags the page depends on in ``get_cache_tags``.
+    Responses that set cookies or use a CSRF token are never cached, since
+    they are specific to one visitor.
+    """
+    cache_tags = ()
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def get_page_cache_timeout(self):
+        return getattr(settings, 'GREENTECH_PAGE_CACHE_TIMEOUT', 300)
+
+    def _page_key(self, request, versions):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        return f"{PAGE_PREFIX}{type(self).__name__}:{path}:{'.'.join(versions)}"
+
+    def _cached_response(self, request, cached):
+        content, content_type, *rest = cached
+        headers = rest[0] if rest else {}
+        response = HttpResponse(content, content_type=content_type, headers=headers)
+        response['X-Page-Cache'] = 'hit'
+        if 'ETag' in headers or 'Last-Modified' in headers:
+            response = get_conditional_response(
+                request, etag=headers.get('ETag'),
+                last_modified=parse_http_date_safe(headers.get('Last-Modified', '')),
+                response=response,
+            ) or response
+        return response
+
+    def _store_after_render(self, request, response, key, store):
+        if response.status_code != 200 or response.streaming:
+            return response
+
+        def callback(response):
+            session = getattr(request, 'session', None)
+            if (request.META.get('CSRF_COOKIE_NEEDS_UPDATE') or response.cookies
+                    or (session is not None and session.modified)):
+                return
+            headers = {name: response[name] for name in PAGE_HEADERS if name in response}
+            store(key, (response.content, response['Content-Type'], headers), self.get_page_cache_timeout())
+
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(callback)
+        else:
+            callback(response)
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._adispatch(request, *args, **kwargs)
+        if (not self.get_page_cache_timeout() or request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = self._page_key(request, get_tag_versions(self.get_cache_tags()))
+        cached = cache.get(key)
+        if cached is not None:
+            return self._cached_response(request, cached)
+        response = super().dispatch(request, *args, **kwargs)
+        return self._store_after_render(request, response, key, cache.set)
+
+    async def _adispatch(self, request, *args, **kwargs):
+        user = await aget_user(request)
+        if (not self.get_page_cache_timeout() or request.method not in ('GET', 'HEAD')
+                or user.is_authenticated):
+            return await super().dispatch(request, *args, **kwargs)
+
+        key = self._page_key(request, await aget_tag_versions(self.get_cache_tags()))
+        cached = await cache.aget(key)
+        if cached is not None:
+            return self._cached_response(request, cached)
+        response = await super().dispatch(request, *args, **kwargs)
+        # Rendering happens after the view returns, in a worker thread, so
+        # the post-render callback stores the page synchronously.
+        return self._store_after_render(request, response, key, cache.set)
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified validators for detail pages.
+
+    Subclasses return ``(version, last_modified)`` from ``get_validators``
+    (or ``aget_validators`` for async views), or None when the object does
+    not exist. ``version`` is any string that changes whenever the page
+    does. A request whose If-None-Match or If-Modified-Since still matches
+    gets a 304 before the page is rendered. The ETag also covers the user,
+    who sees a different page once logged in, and GREENTECH_RELEASE, so
+    a deploy that changes templates does not leave browsers on old pages.
+
+    Strong ETags are sent; GZipMiddleware weakens them when it compresses
+    the body, and If-None-Match is compared weakly, so 304s still work.
+    """
+
+    def get_validators(self):
+        raise NotImplementedError
+
+    async def aget_validators(self):
+        return await sync_to_async(self.get_validators)()
+
+    def _wants_validators(self, request):
+        # A pending flash message would be lost with a 304.
+        return request.method in ('GET', 'HEAD') and not len(get_messages(request))
+
+    def _validator_values(self, user, validators):
+        version, last_modified = validators
+        release = getattr(settings, 'GREENTECH_RELEASE', '')
+        etag = quote_etag(hashlib.md5(f'{release}:{user.pk}:{version}'.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def _add_validators(self, response, user, etag, timestamp):
+        if response.status_code not in (200, 304):
+            return response
+        response.headers.setdefault('ETag', etag)
+        if timestamp is not None:
+            response.headers.setdefault('Last-Modified', http_date(timestamp))
+        # Revalidate on every use; answering that costs one small query.
+        if user.is_authenticated:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._conditional_adispatch(request, *args, **kwargs)
+        validators = self.get_validators() if self._wants_validators(request) else None
+        if validators is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, timestamp = self._validator_values(request.user, validators)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+        return self._add_validators(response, request.user, etag, timestamp)
+
+    async def _conditional_adispatch(self, request, *args, **kwargs):
+        # Messages may be stored in the session, which is read synchronously.
+        wanted = await sync_to_async(self._wants_validators)(request)
+        validators = await self.aget_validators() if wanted else None
+        if validators is None:
+            return await super().dispatch(request, *args, **kwargs)
+
+        user = await aget_user(request)
+        etag, timestamp = self._validator_values(user, validators)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = await super().dispatch(request, *args, **kwargs)
+        return self._add_validators(response, user, etag, timestamp)
@@ -0,0 +1,101 @@
+"""
+Dashboard row counts and per-post feedback stats.
+
+Each counted model has a SiteCounter row that signals bump on create and
+delete, so the dashboard reads every total in a single query. Bulk writes
+(``bulk_create``, ``QuerySet.update``, raw SQL) bypass signals; run
+``manage.py reconcile_counters`` periodically to correct any drift.
+
+``GreenPost.feedback_count`` and ``last_feedback_at`` are kept the same
+way, with single UPDATEs that do the arithmetic in the database, and are
+recomputed by ``manage.py backfill_feedback_stats``.
+"""
+from django.apps import apps
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Feedback, GreenPost, SiteCounter
+
+# Counter name -> model label
+COUNTED_MODELS = {
+    'posts': 'greentech.GreenPost',
+    'contacts': 'greentech.ContactMessage',
+    'feedbacks': 'greentech.Feedback',
+    'volunteers': 'greentech.VolunteerRequest',
+    'suggestions': 'greentech.Suggestion',
+    'issues': 'greentech.ReportIssue',
+    'events': 'greentech.Event',
+    'users': 'auth.User',
+}
+
+
+def counter_name(model):
+    label = model._meta.label
+    for name, counted in COUNTED_MODELS.items():
+        if counted == label:
+            return name
+    raise LookupError(f"{label} has no counter.")
+
+
+def adjust(name, delta):
+    updated = SiteCounter.objects.filter(name=name).update(
+        value=F('value') + delta, updated_at=timezone.now()
+    )
+    if not updated:
+        # First change since the counter was dropped; count from scratch.
+        reconcile([name])
+
+
+def get_counts():
+    """Return {name: value} for every counter, reconciling missing ones."""
+    counts = dict(SiteCounter.objects.values_list('name', 'value'))
+    missing = [name for name in COUNTED_MODELS if name not in counts]
+    if missing:
+        counts.update(reconcile(missing))
+    return counts
+
+
+def reconcile(names=None):
+    """Recount ``names`` (default: all) from their tables. Returns the fixes."""
+    result = {}
+    for name in names or COUNTED_MODELS:
+        model = apps.get_model(COUNTED_MODELS[name])
+        value = model.objects.count()
+        SiteCounter.objects.update_or_create(name=name, defaults={'value': value})
+        result[name] = value
+    return result
+
+
+def _latest_feedback():
+    return Subquery(
+        Feedback.objects.filter(post=OuterRef('pk'))
+        .order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def feedback_added(post_id):
+    GreenPost.objects.filter(pk=post_id).update(
+        feedback_count=F('feedback_count') + 1, last_feedback_at=_latest_feedback(),
+    )
+
+
+def feedback_removed(post_id):
+    GreenPost.objects.filter(pk=post_id, feedback_count__gt=0).update(
+        feedback_count=F('feedback_count') - 1, last_feedback_at=_latest_feedback(),
+    )
+
+
+def backfill_feedback_stats(post_ids=None):
+    """Recount feedback for ``post_ids`` (default: every post). Returns the rows updated."""
+    posts = GreenPost.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    counts = (
+        Feedback.objects.filter(post=OuterRef('pk')).order_by()
+        .values('post').annotate(count=Count('pk')).values('count')
+    )
+    return posts.update(
+        feedback_count=Coalesce(Subquery(counts, output_field=IntegerField()), 0),
+        last_feedback_at=_latest_feedback(),
+    )
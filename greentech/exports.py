@@ -0,0 +1,135 @@
+"""
+Streaming CSV and JSON Lines exports of the staff tables.
+
+Rows are read with ``values_list().iterator()``, so neither the database
+driver nor Django holds more than ``CHUNK_SIZE`` rows at a time, and the
+output is produced as the rows arrive. The same generators back the
+download views and ``manage.py export_data``; under ASGI the views wrap
+them in ``aiter_chunks``.
+"""
+import csv
+import io
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ContactMessage, Feedback, VolunteerApplication, VolunteerRequest
+
+CHUNK_SIZE = 2000
+
+# Rows are buffered into pieces of about this many bytes before being
+# yielded, rather than sending one tiny write per row.
+WRITE_SIZE = 64 * 1024
+
+# Export name -> (model, [(column, field lookup), ...])
+EXPORTS = {
+    'contacts': (ContactMessage, [
+        ('id', 'pk'), ('name', 'name'), ('email', 'email'),
+        ('message', 'message'), ('created_at', 'created_at'),
+    ]),
+    'feedback': (Feedback, [
+        ('id', 'pk'), ('post_id', 'post_id'), ('post_title', 'post__title'),
+        ('username', 'user__username'), ('feedback', 'feedback'), ('created_at', 'created_at'),
+    ]),
+    'volunteers': (VolunteerRequest, [
+        ('id', 'pk'), ('username', 'user__username'), ('name', 'name'), ('email', 'email'),
+        ('phone_number', 'phone_number'), ('area_of_interest', 'area_of_interest'),
+        ('availability', 'availability'), ('status', 'status'), ('created_at', 'created_at'),
+    ]),
+    'applications': (VolunteerApplication, [
+        ('id', 'pk'), ('event_id', 'event_id'), ('event_title', 'event__title'),
+        ('username', 'user__username'), ('name', 'name'), ('email', 'email'),
+        ('phone_number', 'phone_number'), ('motivation', 'motivation'),
+        ('status', 'status'), ('created_at', 'created_at'),
+    ]),
+}
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def export_rows(name):
+    """Return the column names and an iterator over value tuples."""
+    model, columns = EXPORTS[name]
+    rows = (
+        model.objects.order_by('pk')
+        .values_list(*[lookup for _, lookup in columns])
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return [column for column, _ in columns], rows
+
+
+def _csv_cell(value):
+    # Spreadsheet apps run cells starting with these as formulas; the
+    # exported text is user input, so keep it inert.
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@', '\t', '\r'):
+        return "'" + value
+    return value
+
+
+def _buffered(lines):
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= WRITE_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def iter_csv(name):
+    header, rows = export_rows(name)
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def line(values):
+        writer.writerow(values)
+        text = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return text
+
+    def lines():
+        yield line(header)
+        for values in rows:
+            yield line([_csv_cell(value) for value in values])
+
+    return _buffered(lines())
+
+
+def iter_jsonl(name):
+    header, rows = export_rows(name)
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return _buffered(
+        encoder.encode(dict(zip(header, values))) + '\n' for values in rows
+    )
+
+
+def iter_export(name, fmt):
+    """Yield ``name`` as ``fmt`` ('csv' or 'jsonl') in text chunks."""
+    if name not in EXPORTS:
+        raise LookupError(f"Unknown export {name!r}")
+    if fmt == 'csv':
+        return iter_csv(name)
+    if fmt == 'jsonl':
+        return iter_jsonl(name)
+    raise LookupError(f"Unknown export format {fmt!r}")
+
+
+async def aiter_chunks(chunks):
+    """
+    Async iterator over the sync iterator ``chunks``. Each chunk is made in
+    the thread the async ORM uses, where the export's database cursor
+    lives, and the event loop stays free while it is.
+    """
+    next_chunk = sync_to_async(next)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
@@ -77,4 +77,29 @@ class VolunteerApplicationForm(forms.ModelForm):
         widgets = {
             'event': forms.HiddenInput(),
             'motivation': forms.Textarea(attrs={'class': 'form-control', 'rows': 4}),
-        }
\ No newline at end of file
+        }
+
+
+class BulkModerationForm(forms.Form):
+    """Accept or deny several requests at once; ``ids`` are primary keys."""
+    STATUSES = {'accept': 'A', 'deny': 'D'}
+    MAX_IDS = 1000
+
+    action = forms.ChoiceField(choices=[('accept', 'Accept'), ('deny', 'Deny')])
+    ids = forms.Field(widget=forms.MultipleHiddenInput)
+
+    def clean_ids(self):
+        ids = self.cleaned_data['ids']
+        if not isinstance(ids, list):
+            ids = [ids]
+        try:
+            ids = {int(pk) for pk in ids}
+        except (TypeError, ValueError):
+            raise forms.ValidationError("Invalid selection.")
+        if len(ids) > self.MAX_IDS:
+            raise forms.ValidationError(f"Select at most {self.MAX_IDS} at a time.")
+        return sorted(ids)
+
+    @property
+    def status(self):
+        return self.STATUSES[self.cleaned_data['action']]
@@ -0,0 +1,110 @@
+"""
+iCalendar (RFC 5545) feed of events.
+
+Each event's VEVENT block is cached under its id and ``updated_at``, so
+building the feed only renders events that changed since the last build;
+everything else comes from one ``get_many``. The feed's ETag is a hash of
+every (id, updated_at) pair in the window, which also changes when an
+event is deleted, and is computed from a single index-only query before
+anything is rendered.
+"""
+import datetime
+import hashlib
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Event
+
+VEVENT_PREFIX = 'greentech:ical:'
+
+# Past events stay in the feed this long, so calendars keep recent history.
+KEEP_PAST = datetime.timedelta(days=90)
+
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+
+# Seconds calendar apps may use the feed before asking again.
+MAX_AGE = 15 * 60
+
+
+def escape(text):
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+    )
+
+
+def fold(line):
+    """Split ``line`` into 75-octet pieces joined by CRLF + space."""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Never cut a multi-byte character in half.
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode('utf-8'))
+        start, limit = end, 74
+    return '\r\n '.join(parts)
+
+
+def _stamp(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def vevent(event):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.pk}@greentech',
+        f'DTSTAMP:{_stamp(event.updated_at)}',
+        f'LAST-MODIFIED:{_stamp(event.updated_at)}',
+        f'DTSTART;VALUE=DATE:{event.date:%Y%m%d}',
+        f'DTEND;VALUE=DATE:{event.date + datetime.timedelta(days=1):%Y%m%d}',
+        f'SUMMARY:{escape(event.title)}',
+        f'LOCATION:{escape(event.location)}',
+        f'DESCRIPTION:{escape(event.description)}',
+        'END:VEVENT',
+    ]
+    return ''.join(fold(line) + '\r\n' for line in lines)
+
+
+def _key(pk, updated_at):
+    return f'{VEVENT_PREFIX}{pk}:{updated_at.timestamp()}'
+
+
+def feed_versions(today=None):
+    """[(pk, updated_at)] for the events in the feed, in date order."""
+    today = today or timezone.localdate()
+    return list(
+        Event.objects.filter(date__gte=today - KEEP_PAST)
+        .order_by('date', 'pk').values_list('pk', 'updated_at')
+    )
+
+
+def feed_etag(versions):
+    digest = hashlib.md5()
+    for pk, updated_at in versions:
+        digest.update(f'{pk}:{updated_at.timestamp()};'.encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def build_feed(versions):
+    keys = {pk: _key(pk, updated_at) for pk, updated_at in versions}
+    blocks = cache.get_many(list(keys.values()))
+    missing = [pk for pk, key in keys.items() if key not in blocks]
+    if missing:
+        fresh = {keys[event.pk]: vevent(event) for event in Event.objects.filter(pk__in=missing)}
+        # Blocks for superseded versions are never read again and expire.
+        cache.set_many(fresh, 24 * 60 * 60)
+        blocks.update(fresh)
+    return ''.join([
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        'PRODID:-//GreenTech//Events//EN\r\n',
+        'CALSCALE:GREGORIAN\r\n',
+        'X-WR-CALNAME:GreenTech events\r\n',
+        *[blocks[key] for key in keys.values() if key in blocks],
+        'END:VCALENDAR\r\n',
+    ])
@@ -0,0 +1,100 @@
+"""
+Resized, metadata-free variants of GreenPost images.
+
+Each variant is written once per output format and recorded on the post
+in ``image_variants``::
+
+    {"card": {"width": 640, "height": 360,
+              "webp": "post_images/variants/12/card.webp",
+              "jpeg": "post_images/variants/12/card.jpg"}, ...}
+
+Templates build ``srcset`` from that mapping so browsers download the
+smallest file that fills the slot instead of the original upload.
+"""
+import io
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+# Variant name -> maximum width in pixels. Images are never upscaled.
+VARIANTS = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1600,
+}
+
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+QUALITY = {'avif': 55, 'webp': 78, 'jpeg': 82}
+
+
+def get_formats():
+    """Output formats, best first. JPEG is always produced as the fallback."""
+    formats = getattr(settings, 'GREENTECH_IMAGE_FORMATS', ('webp', 'jpeg'))
+    formats = [f for f in formats if f == 'jpeg' or features.check(f)]
+    if 'jpeg' not in formats:
+        formats.append('jpeg')
+    return formats
+
+
+def _encode(image, fmt):
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A') if 'A' in image.getbands() else None)
+        image = background
+    buffer = io.BytesIO()
+    # No exif/icc arguments: the re-encoded file carries no metadata.
+    image.save(buffer, format=fmt.upper(), quality=QUALITY[fmt], optimize=fmt == 'jpeg')
+    return buffer.getvalue()
+
+
+def variant_dir(post):
+    return posixpath.join(posixpath.dirname(post.image.name), 'variants', str(post.pk))
+
+
+def delete_variants(post):
+    storage = post.image.storage
+    for variant in (post.image_variants or {}).values():
+        for fmt in EXTENSIONS:
+            if variant.get(fmt):
+                storage.delete(variant[fmt])
+
+
+def process_post_image(post):
+    """Generate the variants for ``post.image`` and save them on the post."""
+    if not post.image:
+        return {}
+    storage = post.image.storage
+    with post.image.open('rb') as f:
+        source = Image.open(f)
+        source.load()
+    source = ImageOps.exif_transpose(source)
+    if source.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in source.getbands() or 'transparency' in source.info
+        source = source.convert('RGBA' if has_alpha else 'RGB')
+
+    delete_variants(post)
+    formats = get_formats()
+    variants = {}
+    seen_widths = set()
+    for name, max_width in VARIANTS.items():
+        image = source
+        if image.width > max_width:
+            height = round(image.height * max_width / image.width)
+            image = image.resize((max_width, height), Image.LANCZOS)
+        if image.width in seen_widths:
+            continue  # small originals produce identical variants
+        seen_widths.add(image.width)
+
+        variant = {'width': image.width, 'height': image.height}
+        for fmt in formats:
+            path = posixpath.join(variant_dir(post), f'{name}.{EXTENSIONS[fmt]}')
+            storage.delete(path)
+            variant[fmt] = storage.save(path, ContentFile(_encode(image, fmt)))
+        variants[name] = variant
+
+    post.image_variants = variants
+    post.image_width, post.image_height = source.size
+    post.save(update_fields=['image_variants', 'image_width', 'image_height'])
+    return variants
@@ -0,0 +1,234 @@
+"""
+Bulk loading of posts, events, community requests and users.
+
+Input is read a row at a time from CSV (with a header line) or JSON Lines.
+Rows are validated a batch at a time: field values go through the model
+fields' own ``clean()``, usernames are resolved with one query per batch,
+and each valid batch is written with ``bulk_create`` in its own
+transaction. A bad row, including a JSON line that does not parse, is
+reported and skipped; the rest of its batch is still imported.
+
+``bulk_create`` sends no signals, so counters, cached pages and the search
+index are brought up to date once at the end instead of per row.
+"""
+import csv
+import json
+import time
+from collections import namedtuple
+from itertools import islice
+
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .caching import invalidate_tags
+from .counters import reconcile
+from .models import Event, GreenPost, VolunteerRequest
+from .search import get_backend
+
+ImportResult = namedtuple('ImportResult', ['created', 'errors', 'seconds'])
+
+# Stands in for an input line that could not be read as a row.
+UnreadableRow = namedtuple('UnreadableRow', ['message'])
+
+
+def read_rows(stream, fmt):
+    """Yield one dict per input row from a text stream, or an UnreadableRow."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield UnreadableRow(f"Line {number} is not valid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield UnreadableRow(f"Line {number} is not a JSON object.")
+            continue
+        yield row
+
+
+class Importer:
+    """How to turn input rows into unsaved instances of ``model``."""
+    model = None
+    fields = ()
+    # Input column holding a username, and the foreign key it fills in
+    user_column = None
+    user_field = None
+    user_required = True
+    counters = ()
+    cache_tags = ()
+
+    def clean_fields(self, row):
+        values = {}
+        for name in self.fields:
+            field = self.model._meta.get_field(name)
+            raw = row.get(name)
+            if raw in (None, '') and field.has_default():
+                continue
+            try:
+                values[name] = field.clean('' if raw is None else raw, None)
+            except ValidationError as e:
+                raise ValidationError(f"{name}: {' '.join(e.messages)}")
+        return values
+
+    def build(self, row, users):
+        if isinstance(row, UnreadableRow):
+            raise ValidationError(row.message)
+        values = self.clean_fields(row)
+        if self.user_column:
+            username = str(row.get(self.user_column) or '').strip()
+            if username:
+                if username not in users:
+                    raise ValidationError(f"{self.user_column}: unknown user {username!r}")
+                values[self.user_field] = users[username]
+            elif self.user_required:
+                raise ValidationError(f"{self.user_column}: This field cannot be blank.")
+        return self.model(**values)
+
+    def check_batch(self, objs):
+        """Map the index of each object that clashes with another or an existing row to why."""
+        return {}
+
+    def finish(self):
+        reconcile(list(self.counters))
+        if self.cache_tags:
+            invalidate_tags(*self.cache_tags)
+
+
+class PostImporter(Importer):
+    model = GreenPost
+    fields = ('title', 'content')
+    user_column = 'author'
+    user_field = 'author_id'
+    counters = ('posts',)
+    cache_tags = ('posts',)
+
+    def finish(self):
+        super().finish()
+        get_backend().rebuild()
+
+
+class EventImporter(Importer):
+    model = Event
+    fields = ('title', 'description', 'date', 'location')
+    user_column = 'created_by'
+    user_field = 'created_by_id'
+    counters = ('events',)
+    cache_tags = ('events',)
+
+
+class VolunteerRequestImporter(Importer):
+    model = VolunteerRequest
+    fields = ('name', 'email', 'phone_number', 'area_of_interest', 'availability', 'status')
+    user_column = 'user'
+    user_field = 'user_id'
+    user_required = False
+    counters = ('volunteers',)
+
+    def check_batch(self, objs):
+        user_ids = [obj.user_id for obj in objs if obj.user_id]
+        taken = set(
+            VolunteerRequest.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+        )
+        clashes = {}
+        for i, obj in enumerate(objs):
+            if obj.user_id in taken:
+                clashes[i] = "user already has a community request"
+            elif obj.user_id:
+                taken.add(obj.user_id)
+        return clashes
+
+
+class UserImporter(Importer):
+    """
+    ``password`` may hold a hash in Django's format, which is stored as is,
+    or be left empty for an unusable password. Plain-text passwords are
+    hashed, which is deliberately slow and dominates the import time.
+    """
+    model = User
+    fields = ('username', 'email', 'first_name', 'last_name')
+    counters = ('users',)
+
+    def build(self, row, users):
+        user = super().build(row, users)
+        password = row.get('password') or ''
+        try:
+            identify_hasher(password)
+        except ValueError:
+            password = make_password(password or None)
+        user.password = password
+        return user
+
+    def check_batch(self, objs):
+        taken = set(
+            User.objects.filter(username__in=[obj.username for obj in objs])
+            .values_list('username', flat=True)
+        )
+        clashes = {}
+        for i, obj in enumerate(objs):
+            if obj.username in taken:
+                clashes[i] = f"username {obj.username!r} is already taken"
+            taken.add(obj.username)
+        return clashes
+
+
+IMPORTERS = {
+    'posts': PostImporter,
+    'events': EventImporter,
+    'volunteers': VolunteerRequestImporter,
+    'users': UserImporter,
+}
+
+
+def import_rows(kind, rows, batch_size=1000, progress=None):
+    """
+    Import ``rows`` (dicts) as ``kind``. Returns an ImportResult whose
+    ``errors`` lists (row number, message) for every skipped row.
+    ``progress(created, seconds)`` is called after each batch.
+    """
+    importer = IMPORTERS[kind]()
+    created, errors = 0, []
+    started = time.perf_counter()
+    numbered = enumerate(rows, 1)
+    try:
+        while batch := list(islice(numbered, batch_size)):
+            users = {}
+            if importer.user_column:
+                usernames = {
+                    str(row.get(importer.user_column) or '').strip()
+                    for _, row in batch if isinstance(row, dict)
+                }
+                users = dict(
+                    User.objects.filter(username__in=usernames - {''}).values_list('username', 'pk')
+                )
+
+            objs, numbers = [], []
+            for number, row in batch:
+                try:
+                    objs.append(importer.build(row, users))
+                except ValidationError as e:
+                    errors.append((number, ' '.join(e.messages)))
+                    continue
+                numbers.append(number)
+            clashes = importer.check_batch(objs)
+            for i, message in clashes.items():
+                errors.append((numbers[i], message))
+            objs = [obj for i, obj in enumerate(objs) if i not in clashes]
+
+            with transaction.atomic():
+                importer.model.objects.bulk_create(objs)
+            created += len(objs)
+            if progress:
+                progress(created, time.perf_counter() - started)
+    finally:
+        # Batches already written need their counters and caches refreshed
+        # even if a later one fails.
+        importer.finish()
+    errors.sort()
+    return ImportResult(created, errors, time.perf_counter() - started)
+
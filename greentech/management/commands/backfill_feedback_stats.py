@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from greentech.counters import backfill_feedback_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute GreenPost.feedback_count and last_feedback_at from the "
+        "Feedback table, e.g. after bulk loads or raw SQL that skipped signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('post_ids', nargs='*', type=int, help="Only these posts (default: all).")
+
+    def handle(self, *args, **options):
+        updated = backfill_feedback_stats(options['post_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed feedback stats for {updated} post(s)."))
@@ -0,0 +1,76 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from greentech.counters import reconcile
+from greentech.models import ContactMessage
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure write throughput of the configured database with several "
+        "threads inserting rows concurrently. The rows are removed afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        marker = f'bench-{uuid.uuid4().hex[:8]}'
+        deadline = time.perf_counter() + options['seconds']
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def writer():
+            mine, failed = [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            ContactMessage.objects.create(
+                                name=marker, email='bench@example.com', message='benchmark',
+                            )
+                    except OperationalError:
+                        failed += 1
+                        continue
+                    mine.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        threads = [threading.Thread(target=writer) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        ContactMessage.objects.filter(name=marker).delete()
+        reconcile(['contacts'])
+
+        settings_dict = connection.settings_dict
+        self.stdout.write(f"engine:      {settings_dict['ENGINE']}")
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.stdout.write(f"journal:     {cursor.fetchone()[0]}")
+        self.stdout.write(f"threads:     {options['threads']}")
+        self.stdout.write(f"rows:        {len(latencies)} in {elapsed:.1f}s")
+        self.stdout.write(f"throughput:  {len(latencies) / elapsed:.0f} rows/s")
+        self.stdout.write(f"errors:      {sum(errors)} (database locked)")
+        if latencies:
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"latency:     p50 {statistics.median(latencies) * 1000:.1f}ms, "
+                f"p99 {p99 * 1000:.1f}ms"
+            )
@@ -0,0 +1,85 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test a running server: keep --concurrency connections busy "
+        "requesting URL for --seconds. With --slow, each client trickles its "
+        "request headers over that many seconds, like a visitor on a poor "
+        "mobile connection, which ties up a thread per connection under WSGI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="e.g. http://127.0.0.1:8000/")
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--slow', type=float, default=0.0)
+        parser.add_argument('--timeout', type=float, default=30.0)
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError("Only plain http:// URLs are supported.")
+        latencies, errors, elapsed = asyncio.run(self.run(url, options))
+
+        self.stdout.write(f"url:         {options['url']}")
+        self.stdout.write(f"clients:     {options['concurrency']} (slow {options['slow']}s)")
+        self.stdout.write(f"requests:    {len(latencies)} in {elapsed:.1f}s")
+        self.stdout.write(f"throughput:  {len(latencies) / elapsed:.1f} req/s")
+        self.stdout.write(f"errors:      {errors}")
+        if latencies:
+            latencies.sort()
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(
+                f"latency:     p50 {statistics.median(latencies) * 1000:.0f}ms, "
+                f"p99 {p99 * 1000:.0f}ms"
+            )
+
+    async def run(self, url, options):
+        port = url.port or 80
+        target = (url.path or '/') + (f'?{url.query}' if url.query else '')
+        lines = [
+            f'GET {target} HTTP/1.1\r\n',
+            f'Host: {url.netloc}\r\n',
+            'User-Agent: greentech-bench\r\n',
+            'Accept: text/html\r\n',
+            'Connection: close\r\n',
+            '\r\n',
+        ]
+        pause = options['slow'] / (len(lines) - 1)
+        deadline = time.perf_counter() + options['seconds']
+        latencies, errors = [], 0
+
+        async def request():
+            reader, writer = await asyncio.open_connection(url.hostname, port)
+            try:
+                for i, line in enumerate(lines):
+                    if i and pause:
+                        await asyncio.sleep(pause)
+                    writer.write(line.encode())
+                    await writer.drain()
+                # Time from the last header byte to the full response.
+                start = time.perf_counter()
+                response = await reader.read()
+            finally:
+                writer.close()
+            if not response.startswith(b'HTTP/1.1 200'):
+                raise ValueError(response[:40])
+            return time.perf_counter() - start
+
+        async def client():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                try:
+                    latencies.append(await asyncio.wait_for(request(), options['timeout']))
+                except (OSError, ValueError, asyncio.TimeoutError):
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(options['concurrency'])))
+        return latencies, errors, time.perf_counter() - started
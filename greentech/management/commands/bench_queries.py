@@ -0,0 +1,60 @@
+import re
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from greentech.models import (
+    GreenPost, ContactMessage, Feedback,
+    VolunteerRequest, Event, VolunteerApplication
+)
+
+
+def hot_queries():
+    """The list and filter queries behind the main pages, as the views run them."""
+    post = GreenPost.objects.order_by('-created_at', '-id').first()
+    application = VolunteerApplication.objects.exclude(user=None).first()
+    user_id = application.user_id if application else 0
+    middle = GreenPost.objects.order_by('created_at', 'id')[GreenPost.objects.count() // 2:].first()
+    queries = {'home first page': GreenPost.objects.order_by('-created_at', '-id')[:13]}
+    if middle:  # the keyset probe needs a post to page from
+        queries['home deep page'] = GreenPost.objects.filter(
+            created_at__lt=middle.created_at,
+        ).order_by('-created_at', '-id')[:13]
+    queries.update({
+        'post feedback': Feedback.objects.filter(post=post).order_by('-created_at', '-id')[:21],
+        'feedback list': Feedback.objects.order_by('-created_at', '-id')[:26],
+        'contact messages': ContactMessage.objects.order_by('-created_at', '-id')[:26],
+        'community requests': VolunteerRequest.objects.order_by('-created_at', '-id')[:26],
+        'pending requests': VolunteerRequest.objects.filter(status='P').order_by('created_at')[:26],
+        'event list': Event.objects.order_by('-date', '-id')[:11],
+        'user applications': VolunteerApplication.objects.filter(user_id=user_id),
+        'already applied': VolunteerApplication.objects.filter(
+            user_id=user_id, event_id=application.event_id if application else 0,
+        )[:1],
+        'pending applications': VolunteerApplication.objects.filter(status='P').order_by('created_at')[:26],
+    })
+    return queries
+
+
+class Command(BaseCommand):
+    help = "Show the query plan and median run time of the hot list/filter queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--plans', action='store_true', help="Print EXPLAIN output.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'query':<22} {'median ms':>10}  plan")
+        for name, query in hot_queries().items():
+            timings = []
+            for _ in range(options['runs']):
+                start = time.perf_counter()
+                list(query.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            plan = query.explain()
+            # SQLite prefixes plan rows with node ids; drop them for the summary
+            summary = ' / '.join(re.sub(r'^[\d\s]+', '', line).strip(' -|') for line in plan.splitlines())
+            self.stdout.write(f"{name:<22} {statistics.median(timings):>10.2f}  {summary[:90]}")
+            if options['plans']:
+                self.stdout.write(plan)
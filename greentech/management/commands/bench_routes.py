@@ -0,0 +1,62 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from greentech.benchmarks import ClientRunner, ServerRunner, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every page as the anonymous, volunteer and staff personas "
+        "and save req/s, latency percentiles and query counts as JSON. Run "
+        "generate_data first. With --server the requests go over HTTP to a "
+        "running server on the same database; otherwise they go through the "
+        "test client in this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--server', help="Base URL, e.g. http://127.0.0.1:8000")
+        parser.add_argument('--requests', type=int, default=50, help="Requests per page")
+        parser.add_argument('--concurrency', type=int, default=1, help="With --server only")
+        parser.add_argument('--route', action='append', help="Only these route names")
+        parser.add_argument('--output', help="Default: benchmarks/<commit>-<mode>.json")
+        parser.add_argument('--compare', help="An earlier report to compare against")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+        runner = ServerRunner(options['server']) if options['server'] else ClientRunner()
+        try:
+            report = run_benchmark(runner, options['requests'], options['concurrency'], options['route'])
+        except LookupError as e:
+            raise CommandError(e)
+
+        baseline = {}
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = {(r['route'], r['persona'], r['path']): r for r in json.load(f)['routes']}
+
+        self.stdout.write(
+            f"{'route':<20} {'persona':<10} {'status':>6} {'req/s':>8} {'p50':>8} "
+            f"{'p95':>8} {'p99':>8} {'queries':>7}"
+        )
+        for row in report['routes']:
+            line = (
+                f"{row['route']:<20} {row['persona']:<10} {row['status']:>6} {row['rps']:>8} "
+                f"{row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {'-' if row['queries'] is None else row['queries']:>7}"
+            )
+            old = baseline.get((row['route'], row['persona'], row['path']))
+            if old:
+                change = (row['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+                line += f"   p50 {change:+.0f}%, queries {old['queries']} -> {row['queries']}"
+            self.stdout.write(line)
+
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f"{report['commit'] or 'unknown'}-{report['mode']}.json",
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Saved {output}"))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from greentech.exports import EXPORTS, FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = "Stream a staff table as CSV or JSON Lines to stdout or a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help="File to write to (default: stdout)")
+
+    def handle(self, *args, **options):
+        chunks = iter_export(options['name'], options['format'])
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from greentech.benchmarks import DEFAULT_SIZES, PASSWORD, PERSONAS, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with generated benchmark data and create the "
+        "benchmark persona users. Adds rows on every run."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_SIZES.items():
+            parser.add_argument(f'--{name}', type=int, default=default)
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help="Multiply every size by this factor")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        sizes = {name: int(options[name] * options['scale']) for name in DEFAULT_SIZES}
+        counts = generate(sizes, seed=options['seed'])
+        for name, value in counts.items():
+            self.stdout.write(f"{name:<14} {value}")
+        logins = ', '.join(username for username in PERSONAS.values() if username)
+        self.stdout.write(self.style.SUCCESS(f"Done. Persona logins: {logins} / {PASSWORD}"))
@@ -0,0 +1,58 @@
+import io
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from greentech.imports import IMPORTERS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load posts, events, community requests or users from CSV or "
+        "JSON Lines. Posts, events and requests name their user by username "
+        "in an 'author', 'created_by' or 'user' column."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help="Input file, or - for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help="Default: from the file extension")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--show-errors', type=int, default=20,
+                            help="How many skipped rows to list")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if path == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            try:
+                stream = open(path, encoding='utf-8-sig', newline='')
+            except OSError as e:
+                raise CommandError(e)
+
+        def progress(created, seconds):
+            if options['verbosity'] > 1:
+                self.stderr.write(f"{created} rows, {created / seconds:.0f} rows/s")
+
+        with stream:
+            try:
+                result = import_rows(
+                    options['kind'], read_rows(stream, fmt), options['batch_size'], progress,
+                )
+            except ValueError as e:
+                raise CommandError(e)
+
+        for number, message in result.errors[:options['show_errors']]:
+            self.stderr.write(f"row {number}: {message}")
+        if len(result.errors) > options['show_errors']:
+            self.stderr.write(f"... and {len(result.errors) - options['show_errors']} more")
+        rate = result.created / result.seconds if result.seconds else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} {options['kind']} in {result.seconds:.1f}s "
+            f"({rate:.0f} rows/s), skipped {len(result.errors)}."
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from greentech.images import process_post_image
+from greentech.models import GreenPost
+
+
+class Command(BaseCommand):
+    help = "Generate resized image variants (and stored dimensions) for posts that do not have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Regenerate variants for every post.")
+
+    def handle(self, *args, **options):
+        posts = GreenPost.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(image_variants={})
+        processed = 0
+        for post in posts.iterator():
+            try:
+                process_post_image(post)
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f"Post {post.pk}: {exc}")
+                continue
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed images for {processed} posts."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from greentech.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the GreenPost full-text search index from the posts table."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index using {type(backend).__name__}."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from greentech.counters import COUNTED_MODELS, reconcile
+from greentech.models import SiteCounter
+
+
+class Command(BaseCommand):
+    help = "Recount the dashboard counters from their tables and fix any drift."
+
+    def handle(self, *args, **options):
+        before = dict(SiteCounter.objects.values_list('name', 'value'))
+        after = reconcile()
+        for name in COUNTED_MODELS:
+            old, new = before.get(name), after[name]
+            if old != new:
+                self.stdout.write(f"{name}: {old} -> {new}")
+        self.stdout.write(self.style.SUCCESS("Counters reconciled."))
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from greentech.requestlog import aggregate, read_lines
+
+SORTS = ('time_s', 'requests', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms', 'sql_ms', 'queries')
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarise request log files written by RequestLogMiddleware: per "
+        "route (or view), the estimated number of requests, latency "
+        "percentiles and average SQL time, queries, template time and size. "
+        "Reads standard input when no file is given; .gz files are fine."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', default=['-'], help="Log files")
+        parser.add_argument('--by', choices=['route', 'view'], default='route')
+        parser.add_argument('--sort', choices=SORTS, default='time_s',
+                            help="time_s (default) is total time spent, busiest first")
+        parser.add_argument('--limit', type=int, default=20, help="Rows to show; 0 for all")
+        parser.add_argument('--json', action='store_true', help="Print the rows as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            rows = aggregate(read_lines(options['paths']), by=options['by'])
+        except OSError as e:
+            raise CommandError(e)
+        rows.sort(key=lambda row: row[options['sort']] or 0, reverse=True)
+        if options['limit']:
+            rows = rows[:options['limit']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write("No request log entries found.")
+            return
+
+        width = max(len(options['by']), *(len(row[options['by']]) for row in rows))
+        self.stdout.write(
+            f"{options['by']:<{width}} {'requests':>8} {'slow':>5} {'5xx':>5} {'p50':>8} {'p90':>8} "
+            f"{'p95':>8} {'p99':>8} {'max':>8} {'sql':>7} {'queries':>7} {'tmpl':>7} {'KB':>7}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row[options['by']]:<{width}} {row['requests']:>8} {row['slow']:>5} {row['errors']:>5} "
+                f"{row['p50_ms']:>8} {row['p90_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {row['max_ms']:>8} "
+                f"{_cell(row['sql_ms']):>7} {_cell(row['queries']):>7} {_cell(row['template_ms']):>7} "
+                f"{_cell(row['bytes'] and round(row['bytes'] / 1024, 1)):>7}"
+            )
+        self.stdout.write("Times in milliseconds; sql, queries, tmpl and KB are per-request averages.")
+
+
+def _cell(value):
+    return '-' if value is None else value
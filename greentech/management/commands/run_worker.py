@@ -0,0 +1,54 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from greentech.queue import claim_next, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help="Number of worker threads.")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--burst', action='store_true',
+                            help="Exit once the queue is empty instead of polling.")
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        self.processed = 0
+        self.lock = threading.Lock()
+        threads = options['threads']
+        self.stdout.write(f"Worker started with {threads} thread(s).")
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [
+                pool.submit(self.work, options['interval'], options['burst'])
+                for _ in range(threads)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except KeyboardInterrupt:
+                self.stopping.set()
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {self.processed} job(s)."))
+
+    def work(self, interval, burst):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                job = claim_next()
+                if job is None:
+                    if burst:
+                        return
+                    time.sleep(interval)
+                    continue
+                run_job(job)
+                with self.lock:
+                    self.processed += 1
+                self.stdout.write(str(job))
+        finally:
+            connection.close()
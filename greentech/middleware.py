@@ -0,0 +1,371 @@
+import asyncio
+import contextvars
+import datetime
+import json
+import logging
+import mimetypes
+import os
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date
+
+from .requestlog import StackSampler
+
+
+class QueryStats:
+    """SQL statements executed while handling one request."""
+
+    def __init__(self, keep_slowest=3, keep_statements=0):
+        self.count = 0
+        self.duration = 0.0
+        self.keep_slowest = keep_slowest
+        self.slowest = []  # (duration, sql), slowest first
+        self.keep_statements = keep_statements
+        self.statements = []  # (duration, sql), the first keep_statements in order
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if self.keep_slowest:
+                self.slowest.append((elapsed, sql))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[self.keep_slowest:]
+            if len(self.statements) < self.keep_statements:
+                self.statements.append((elapsed, sql))
+
+
+# QueryStats of the request being handled in this context. Database
+# connections are per thread, and under ASGI the ORM runs in a thread of
+# its own, so queries find their request through this instead of through
+# a wrapper installed on the connection for each request.
+_request_stats = contextvars.ContextVar('greentech_query_stats', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _request_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """Route ``connection``'s queries to QueryCountMiddleware (see signals)."""
+    if _record_query not in connection.execute_wrappers:
+        # At the front, so a temporary execute_wrapper() pops its own entry.
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _header_text(text, limit=100):
+    # Server-Timing descriptions are quoted strings in a latin-1 header.
+    text = ' '.join(text.split())[:limit]
+    text = text.encode('ascii', 'replace').decode()
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+class AsyncCapableMiddleware:
+    """
+    Base for middleware that runs in the mode of the handler chain around
+    it. Under ASGI, Django would otherwise adapt a sync-only middleware by
+    running the rest of the request in a thread. Subclasses implement
+    ``handle`` and its async twin ``ahandle``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.ahandle(request)
+        return self.handle(request)
+
+
+class QueryCountMiddleware(AsyncCapableMiddleware):
+    """
+    Record the number and duration of SQL queries for each request on
+    ``request.query_stats``. With DEBUG on, the totals and the slowest
+    statements are also sent as a ``Server-Timing`` header so they show up
+    in the browser's network panel. The first GREENTECH_REQUEST_LOG_SQL
+    statements are kept for RequestLogMiddleware's slow-request entries.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.keep_slowest = getattr(settings, 'GREENTECH_SLOW_QUERY_COUNT', 3)
+        self.keep_statements = (
+            getattr(settings, 'GREENTECH_REQUEST_LOG_SQL', 0)
+            if getattr(settings, 'GREENTECH_SLOW_REQUEST_MS', 0) else 0
+        )
+
+    def handle(self, request):
+        request.query_stats = QueryStats(self.keep_slowest, self.keep_statements)
+        token = _request_stats.set(request.query_stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self._add_timing(request, response, time.perf_counter() - start)
+
+    async def ahandle(self, request):
+        request.query_stats = QueryStats(self.keep_slowest, self.keep_statements)
+        # sync_to_async copies the context, so the ORM's thread sees it too.
+        token = _request_stats.set(request.query_stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        return self._add_timing(request, response, time.perf_counter() - start)
+
+    def _add_timing(self, request, response, total):
+        if settings.DEBUG:
+            stats = request.query_stats
+            metrics = [
+                f'total;dur={total * 1000:.1f}',
+                f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"',
+            ]
+            for i, (elapsed, sql) in enumerate(stats.slowest, 1):
+                metrics.append(f'sql-{i};dur={elapsed * 1000:.1f};desc="{_header_text(sql)}"')
+            existing = response.get('Server-Timing')
+            if existing:
+                metrics.insert(0, existing)
+            response['Server-Timing'] = ', '.join(metrics)
+        return response
+
+
+class RequestLogMiddleware(AsyncCapableMiddleware):
+    """
+    Log one JSON line per request to the ``greentech.requests`` logger; see
+    ``greentech.requestlog``. Goes first in MIDDLEWARE so its time covers
+    the other middleware, and reads the SQL figures QueryCountMiddleware
+    leaves on the request.
+
+    A GREENTECH_REQUEST_LOG_SAMPLE fraction of requests is logged at INFO.
+    Requests slower than GREENTECH_SLOW_REQUEST_MS are always logged, at
+    WARNING, with their SQL statements and a stack profile of the time
+    after the threshold. Under ASGI the profile follows the request's
+    task: where it is running, or which await it is waiting on.
+    """
+    logger = logging.getLogger('greentech.requests')
+
+    def __init__(self, get_response):
+        self.sample = getattr(settings, 'GREENTECH_REQUEST_LOG_SAMPLE', 0)
+        slow_ms = getattr(settings, 'GREENTECH_SLOW_REQUEST_MS', 0)
+        if not self.sample and not slow_ms:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.slow = slow_ms / 1000 if slow_ms else None
+        self.sampler = StackSampler(self.slow) if slow_ms else None
+        if self.async_mode:
+            self.process_template_response = self.aprocess_template_response
+
+    def handle(self, request):
+        request.template_time = 0.0
+        key = self.sampler.start() if self.sampler else None
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            total = time.perf_counter() - start
+            profile = self.sampler.stop(key) if self.sampler else []
+        self.log(request, response, total, profile)
+        return response
+
+    async def ahandle(self, request):
+        request.template_time = 0.0
+        key = self.sampler.start(asyncio.current_task()) if self.sampler else None
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            total = time.perf_counter() - start
+            profile = self.sampler.stop(key) if self.sampler else []
+        self.log(request, response, total, profile)
+        return response
+
+    def log(self, request, response, total, profile):
+        slow = self.slow is not None and total >= self.slow
+        if slow:
+            weight, level = 1, logging.WARNING
+        elif self.sample and random.random() < self.sample:
+            weight, level = 1 / self.sample, logging.INFO
+        else:
+            return
+        if not self.logger.isEnabledFor(level):
+            return
+        entry = self.entry(request, response, total, weight)
+        if slow:
+            stats = getattr(request, 'query_stats', None)
+            entry['slow'] = True
+            entry['sql'] = [
+                {'ms': round(elapsed * 1000, 2), 'sql': sql} for elapsed, sql in (stats.statements if stats else [])
+            ]
+            entry['profile'] = [{'stack': stack, 'samples': count} for stack, count in profile]
+        self.logger.log(level, json.dumps(entry, default=str))
+
+    def process_template_response(self, request, response):
+        # As the first middleware this runs last, right before rendering.
+        start = time.perf_counter()
+
+        def rendered(response):
+            request.template_time += time.perf_counter() - start
+        response.add_post_render_callback(rendered)
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        # Set as process_template_response in async mode, so Django does
+        # not call it through a thread.
+        return type(self).process_template_response(self, request, response)
+
+    def entry(self, request, response, total, weight):
+        match = request.resolver_match
+        view = getattr(match.func, 'view_class', match.func) if match else None
+        stats = getattr(request, 'query_stats', None)
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+        return {
+            'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'method': request.method,
+            'path': request.path,
+            'route': (match.url_name or match.route) if match else None,
+            'view': f'{view.__module__}.{view.__qualname__}' if view else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'sql_ms': round(stats.duration * 1000, 1) if stats else None,
+            'queries': stats.count if stats else None,
+            'template_ms': round(request.template_time * 1000, 1),
+            'bytes': size,
+            'cache': response.get('X-Page-Cache'),
+            'weight': round(weight, 3),
+        }
+
+
+class StaticFilesMiddleware(AsyncCapableMiddleware):
+    """
+    Serve the files collected into STATIC_ROOT without a separate web
+    server, in the style of WhiteNoise.
+
+    The precompressed ``.br``/``.gz`` sibling written by collectstatic is
+    sent when the browser accepts it. Content-hashed names from the
+    staticfiles manifest never change, so they are cached for a year and
+    marked immutable; other names are revalidated after a minute. The
+    manifest is read at startup, so restart after collectstatic.
+    """
+    max_age = 60
+    immutable_max_age = 365 * 24 * 60 * 60
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT or not settings.STATIC_URL.startswith('/'):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.root = os.path.realpath(settings.STATIC_ROOT)
+        self.prefix = settings.STATIC_URL
+        self.immutable = self._hashed_names()
+
+    def _hashed_names(self):
+        try:
+            with open(os.path.join(self.root, 'staticfiles.json')) as f:
+                return set(json.load(f).get('paths', {}).values())
+        except (OSError, ValueError):
+            return set()
+
+    def _static_name(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            return request.path_info[len(self.prefix):]
+        return None
+
+    def handle(self, request):
+        name = self._static_name(request)
+        response = self.serve(request, name) if name is not None else None
+        return response if response is not None else self.get_response(request)
+
+    async def ahandle(self, request):
+        name = self._static_name(request)
+        response = self.serve(request, name, asynchronous=True) if name is not None else None
+        return response if response is not None else await self.get_response(request)
+
+    def serve(self, request, name, asynchronous=False):
+        path = os.path.realpath(os.path.join(self.root, name))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+
+        served, encoding, compressed = path, None, False
+        accept = request.headers.get('Accept-Encoding', '')
+        for candidate, ext in self.encodings:
+            if os.path.isfile(path + ext):
+                compressed = True
+                if encoding is None and candidate in accept:
+                    served, encoding = path + ext, candidate
+
+        stat = os.stat(served)
+        headers = {
+            'ETag': f'"{stat.st_size:x}-{int(stat.st_mtime):x}"',
+            'Last-Modified': http_date(stat.st_mtime),
+            'Cache-Control': (
+                f'public, max-age={self.immutable_max_age}, immutable'
+                if name in self.immutable else f'public, max-age={self.max_age}'
+            ),
+        }
+        if compressed:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+
+        if headers['ETag'] in request.headers.get('If-None-Match', ''):
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = stat.st_size
+        elif asynchronous:
+            # FileResponse would be read through a thread as a sync iterator,
+            # with a warning; read the blocks in a worker thread instead.
+            response = StreamingHttpResponse(_aread_file(open(served, 'rb')), content_type=content_type)
+            response['Content-Length'] = stat.st_size
+        else:
+            response = FileResponse(open(served, 'rb'), content_type=content_type)
+            del response['Content-Disposition']
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+async def _aread_file(f, block_size=64 * 1024):
+    read = sync_to_async(f.read, thread_sensitive=False)
+    try:
+        while block := await read(block_size):
+            yield block
+    finally:
+        f.close()
+
+
+async def aget_user(request):
+    """
+    ``request.auser()`` for async views. The result also replaces the lazy
+    ``request.user``, which otherwise loads the user a second time when a
+    template or the messages framework touches it.
+    """
+    request.user = await request.auser()
+    return request.user
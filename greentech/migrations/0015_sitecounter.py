@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:01
+
+from django.db import migrations, models
+
+
+COUNTED_MODELS = {
+    'posts': ('greentech', 'GreenPost'),
+    'contacts': ('greentech', 'ContactMessage'),
+    'feedbacks': ('greentech', 'Feedback'),
+    'volunteers': ('greentech', 'VolunteerRequest'),
+    'suggestions': ('greentech', 'Suggestion'),
+    'issues': ('greentech', 'ReportIssue'),
+    'events': ('greentech', 'Event'),
+    'users': ('auth', 'User'),
+}
+
+
+def populate_counters(apps, schema_editor):
+    SiteCounter = apps.get_model('greentech', 'SiteCounter')
+    SiteCounter.objects.bulk_create([
+        SiteCounter(name=name, value=apps.get_model(*label).objects.count())
+        for name, label in COUNTED_MODELS.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('greentech', '0014_greenpost_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
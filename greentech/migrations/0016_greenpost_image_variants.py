@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('greentech', '0015_sitecounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greenpost',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='greenpost',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='greenpost',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='greenpost',
+            name='image',
+            field=models.ImageField(blank=True, height_field='image_height', null=True, upload_to='post_images/', width_field='image_width'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Duplicate applications keep the one with the furthest status (Accepted,
+# then Denied, then Pending), and the earliest of those.
+STATUS_RANK = {'A': 0, 'D': 1, 'P': 2}
+
+
+def remove_duplicate_applications(apps, schema_editor):
+    # The unique constraint below needs one application per (user, event).
+    VolunteerApplication = apps.get_model('greentech', 'VolunteerApplication')
+    duplicates = (
+        VolunteerApplication.objects.exclude(user=None).exclude(event=None)
+        .values('user', 'event').annotate(n=models.Count('pk'))
+        .filter(n__gt=1)
+    )
+    for row in duplicates:
+        applications = list(
+            VolunteerApplication.objects.filter(user=row['user'], event=row['event'])
+            .values_list('pk', 'status', 'created_at')
+        )
+        keep = min(applications, key=lambda a: (STATUS_RANK.get(a[1], len(STATUS_RANK)), a[2], a[0]))
+        VolunteerApplication.objects.filter(user=row['user'], event=row['event']) \
+            .exclude(pk=keep[0]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('greentech', '0017_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='feedback',
+            name='post',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feedbacks', to='greentech.greenpost'),
+        ),
+        migrations.AddIndex(
+            model_name='contactmessage',
+            index=models.Index(fields=['created_at', 'id'], name='greentech_contact_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['date', 'id'], name='greentech_event_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['created_at', 'id'], name='greentech_feedback_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['post', 'created_at', 'id'], name='greentech_feedback_post_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='greenpost',
+            index=models.Index(fields=['created_at', 'id'], name='greentech_post_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerapplication',
+            index=models.Index(fields=['status', 'created_at'], name='greentech_app_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerrequest',
+            index=models.Index(fields=['created_at', 'id'], name='greentech_request_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='volunteerrequest',
+            index=models.Index(fields=['status', 'created_at'], name='greentech_request_status_idx'),
+        ),
+        migrations.RunPython(remove_duplicate_applications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='volunteerapplication',
+            constraint=models.UniqueConstraint(fields=('user', 'event'), name='greentech_application_user_event_uniq'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:45
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_feedback_stats(apps, schema_editor):
+    GreenPost = apps.get_model('greentech', 'GreenPost')
+    Feedback = apps.get_model('greentech', 'Feedback')
+    feedback = Feedback.objects.filter(post=OuterRef('pk')).order_by()
+    GreenPost.objects.update(
+        feedback_count=Coalesce(Subquery(
+            feedback.values('post').annotate(n=Count('pk')).values('n'), output_field=IntegerField(),
+        ), 0),
+        last_feedback_at=Subquery(feedback.order_by('-created_at').values('created_at')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('greentech', '0019_moderationlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greenpost',
+            name='feedback_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='greenpost',
+            name='last_feedback_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='greenpost',
+            index=models.Index(fields=['feedback_count', 'id'], name='greentech_post_discussed_idx'),
+        ),
+        migrations.RunPython(backfill_feedback_stats, migrations.RunPython.noop),
+    ]
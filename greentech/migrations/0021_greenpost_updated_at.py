@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Unknown for existing posts; their creation time is the best guess.
+    GreenPost = apps.get_model('greentech', 'GreenPost')
+    GreenPost.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('greentech', '0020_greenpost_feedback_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='greenpost',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('greentech', '0021_greenpost_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='greenpost',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='post_images/'),
+        ),
+    ]
@@ -1,12 +1,29 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class GreenPost(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     author = models.ForeignKey(User, on_delete=models.CASCADE)
-    image = models.ImageField(upload_to='post_images/', blank=True, null=True)  # New field
+    image = models.ImageField(upload_to='post_images/', blank=True, null=True)
+    # Set by greentech.images.process_post_image. Not width_field/height_field:
+    # those make every load of a post open and decode its image file.
+    image_width = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    image_height = models.PositiveIntegerField(blank=True, null=True, editable=False)
+    # Resized copies written by greentech.images.process_post_image
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Kept current by signals; `manage.py backfill_feedback_stats` recomputes them
+    feedback_count = models.PositiveIntegerField(default=0, editable=False)
+    last_feedback_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='greentech_post_created_idx'),
+            models.Index(fields=['feedback_count', 'id'], name='greentech_post_discussed_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -17,16 +34,31 @@ class ContactMessage(models.Model):
     message = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='greentech_contact_created_idx'),
+        ]
+
     def __str__(self):
         return f"Message from {self.name} ({self.email})"
 
 class Feedback(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    post = models.ForeignKey(GreenPost, on_delete=models.CASCADE, related_name="feedbacks", null=True)
+    # Indexed by greentech_feedback_post_idx below
+    post = models.ForeignKey(GreenPost, on_delete=models.CASCADE, related_name="feedbacks", null=True,
+                             db_index=False)
     feedback = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='greentech_feedback_created_idx'),
+            models.Index(fields=['post', 'created_at', 'id'], name='greentech_feedback_post_idx'),
+        ]
+
     def __str__(self):
+        if self.post_id is None:
+            return f"Feedback by {self.user.username}"
         return f"Feedback by {self.user.username} on {self.post.title}"
 
 class Event(models.Model):
@@ -38,6 +70,11 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['date', 'id'], name='greentech_event_date_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -57,6 +94,14 @@ class VolunteerApplication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=1, choices=STATUS_CHOICES, default='P')
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'event'], name='greentech_application_user_event_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='greentech_app_status_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.event.title} ({self.get_status_display()})"
 
@@ -88,6 +133,10 @@ class VolunteerRequest(models.Model):
     class Meta:
         verbose_name = "Community Request"
         verbose_name_plural = "Community Requests"
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='greentech_request_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='greentech_request_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_status_display()})"
@@ -101,3 +150,64 @@ class ReportIssue(models.Model):
     name = models.CharField(max_length=100)
     issue = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+
+class SiteCounter(models.Model):
+    """Precomputed row counts for the dashboard, kept current by signals."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+class Job(models.Model):
+    """A unit of background work, run by ``manage.py run_worker``."""
+    STATUS_CHOICES = [
+        ('Q', 'Queued'),
+        ('R', 'Running'),
+        ('D', 'Done'),
+        ('F', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=1, choices=STATUS_CHOICES, default='Q')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='greentech_job_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
+
+class ModerationLog(models.Model):
+    """A status change made by staff on a community request or event application."""
+    KIND_CHOICES = [
+        ('R', 'Community request'),
+        ('A', 'Event application'),
+    ]
+
+    kind = models.CharField(max_length=1, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    old_status = models.CharField(max_length=1)
+    new_status = models.CharField(max_length=1)
+    moderator = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'object_id'], name='greentech_modlog_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id}: {self.old_status} -> {self.new_status}"
@@ -0,0 +1,39 @@
+"""
+Status changes for community requests and event applications.
+
+``moderate`` accepts or denies any number of rows with a single UPDATE and
+writes one ModerationLog row per change with a single INSERT, so staff can
+work through a few hundred requests in one POST.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+
+from .models import ModerationLog, VolunteerApplication, VolunteerRequest
+
+KINDS = {
+    VolunteerRequest: 'R',
+    VolunteerApplication: 'A',
+}
+
+ModerationResult = namedtuple('ModerationResult', ['changed', 'unchanged', 'missing'])
+
+
+def moderate(model, ids, status, moderator):
+    """Set ``status`` on the ``model`` rows in ``ids``."""
+    ids = set(ids)
+    with transaction.atomic():
+        current = dict(
+            model.objects.select_for_update().filter(pk__in=ids).values_list('pk', 'status')
+        )
+        changed = sorted(pk for pk, old in current.items() if old != status)
+        if changed:
+            model.objects.filter(pk__in=changed).update(status=status)
+            ModerationLog.objects.bulk_create([
+                ModerationLog(
+                    kind=KINDS[model], object_id=pk, old_status=current[pk],
+                    new_status=status, moderator=moderator,
+                )
+                for pk in changed
+            ])
+    return ModerationResult(len(changed), len(current) - len(changed), len(ids - current.keys()))
@@ -0,0 +1,183 @@
+"""
+Cursor (keyset) pagination for ListViews.
+
+Instead of OFFSET, each page is fetched with a WHERE clause on the ordering
+columns of the last row seen, so page 500 costs the same as page 1. Cursors
+are opaque url-safe strings; clients only pass back what they were given.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+
+
+def encode_cursor(data):
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        raise Http404("Invalid page cursor.")
+    if not isinstance(data, dict):
+        raise Http404("Invalid page cursor.")
+    return data
+
+
+class CursorPage:
+    """Quacks enough like django.core.paginator.Page for the templates."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def _split(field):
+    return (field[1:], True) if field.startswith('-') else (field, False)
+
+
+def keyset_paginate(queryset, ordering, page_size, cursor=None):
+    """
+    Return a CursorPage of ``queryset`` ordered by ``ordering``.
+
+    ``ordering`` must end in a unique column (normally pk) so that every row
+    has a distinct position.
+    """
+    query, finish = _keyset_query(queryset, ordering, page_size, cursor)
+    return finish(list(query))
+
+
+async def akeyset_paginate(queryset, ordering, page_size, cursor=None):
+    """Async version of keyset_paginate."""
+    query, finish = _keyset_query(queryset, ordering, page_size, cursor)
+    return finish([row async for row in query])
+
+
+def _keyset_query(queryset, ordering, page_size, cursor):
+    """
+    Return the sliced queryset for the requested page and a function that
+    turns its rows into a CursorPage.
+    """
+    model = queryset.model
+    fields = [_split(f) for f in ordering]
+    model_fields = [
+        model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        for name, _ in fields
+    ]
+
+    def key(obj):
+        return [field.value_to_string(obj) for field in model_fields]
+
+    direction, values = 'n', None
+    if cursor:
+        data = decode_cursor(cursor)
+        direction, values = data.get('d'), data.get('k')
+        if direction not in ('n', 'p') or not isinstance(values, list) or len(values) != len(fields):
+            raise Http404("Invalid page cursor.")
+
+    backwards = direction == 'p'
+    if values is not None:
+        try:
+            values = [field.to_python(v) for field, v in zip(model_fields, values)]
+        except Exception:
+            raise Http404("Invalid page cursor.")
+        queryset = queryset.filter(_after(fields, values, backwards))
+
+    order = [
+        ('-' if desc != backwards else '') + name
+        for name, desc in fields
+    ]
+
+    def finish(rows):
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = encode_cursor({'d': 'n', 'k': key(rows[-1])})
+            if values is not None and (has_more or not backwards):
+                previous_cursor = encode_cursor({'d': 'p', 'k': key(rows[0])})
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+    return queryset.order_by(*order)[:page_size + 1], finish
+
+
+def _after(fields, values, backwards):
+    """Build ``(a, b, c) > (x, y, z)`` in the ordering's own sense."""
+    condition = Q()
+    for i, (name, desc) in enumerate(fields):
+        lookup = 'lt' if desc != backwards else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[i]})
+        for j in range(i):
+            term &= Q(**{fields[j][0]: values[j]})
+        condition |= term
+    return condition
+
+
+def offset_paginate(fetch, page_size, cursor=None):
+    """
+    CursorPage over a ranked result source that can only be sliced, such as
+    the full-text search backend. ``fetch(limit, offset)`` returns a list.
+    """
+    offset = 0
+    if cursor:
+        offset = decode_cursor(cursor).get('o')
+        if not isinstance(offset, int) or offset < 0:
+            raise Http404("Invalid page cursor.")
+    rows = fetch(page_size + 1, offset)
+    next_cursor = previous_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor({'o': offset + page_size})
+    if offset:
+        previous_cursor = encode_cursor({'o': max(offset - page_size, 0)})
+    return CursorPage(rows[:page_size], next_cursor, previous_cursor)
+
+
+class KeysetPaginationMixin:
+    """
+    Drop-in replacement for ListView pagination. The view's ``ordering`` is
+    used as the keyset, with pk appended as a tie-breaker.
+    """
+    paginate_by = 25
+    cursor_kwarg = 'cursor'
+
+    def get_keyset_ordering(self):
+        ordering = list(self.get_ordering() or [])
+        names = [_split(f)[0] for f in ordering]
+        if 'pk' not in names and 'id' not in names:
+            last_desc = _split(ordering[-1])[1] if ordering else False
+            ordering.append('-pk' if last_desc else 'pk')
+        return ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        page = keyset_paginate(queryset, self.get_keyset_ordering(), page_size, cursor)
+        return None, page, page.object_list, page.has_other_pages()
+
+    async def apaginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        page = await akeyset_paginate(queryset, self.get_keyset_ordering(), page_size, cursor)
+        return None, page, page.object_list, page.has_other_pages()
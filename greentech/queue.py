@@ -0,0 +1,117 @@
+"""
+A small database-backed job queue.
+
+Functions decorated with ``@task`` can be queued with ``enqueue`` from a
+request and are run later by ``manage.py run_worker``. Jobs are rows in the
+Job table, written in the caller's transaction, so a job only becomes
+visible to workers once the request that queued it has committed.
+
+Claiming a job is a single conditional UPDATE, which works on SQLite (no
+SELECT ... FOR UPDATE) as well as PostgreSQL. Failed jobs are retried with
+exponential backoff until ``max_attempts`` is reached.
+
+With ``GREENTECH_TASKS_EAGER = True`` jobs run in-process right after the
+surrounding transaction commits, which is handy for development.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+# Seconds before the first retry; doubled on every further attempt.
+RETRY_DELAY = 10
+
+# A job still marked running after this long is assumed to belong to a
+# worker that died, and is handed out again.
+RUNNING_TIMEOUT = timedelta(minutes=10)
+
+
+def task(func=None, *, name=None, max_attempts=3):
+    def register(func):
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        _registry[func.task_name] = func
+        return func
+    return register(func) if func else register
+
+
+def enqueue(func, *args, delay=None, **kwargs):
+    """Queue ``func(*args, **kwargs)``. Arguments must be JSON-serializable."""
+    run_at = timezone.now() + delay if delay else timezone.now()
+    job = Job.objects.create(
+        task=func.task_name, args=list(args), kwargs=kwargs,
+        max_attempts=func.max_attempts, run_at=run_at,
+    )
+    if getattr(settings, 'GREENTECH_TASKS_EAGER', False):
+        def run_eagerly():
+            # A worker may have claimed it first.
+            if _claim(Job.objects.filter(status='Q'), job.pk, timezone.now()):
+                run_job(job)
+        transaction.on_commit(run_eagerly)
+    return job
+
+
+def _claim(queryset, pk, now):
+    """
+    Mark job ``pk`` as running if it still matches ``queryset``. The
+    conditions are re-checked in the UPDATE, so of several workers that
+    picked the same job only one gets True.
+    """
+    return queryset.filter(pk=pk).update(status='R', started_at=now) == 1
+
+
+def claim_next():
+    """Mark the next due job as running and return it, or None."""
+    now = timezone.now()
+    candidates = Job.objects.filter(status='Q', run_at__lte=now).order_by('run_at', 'pk')
+    stale = Job.objects.filter(status='R', started_at__lt=now - RUNNING_TIMEOUT)
+    for queryset in (candidates, stale):
+        for pk in queryset.values_list('pk', flat=True)[:10]:
+            if _claim(queryset, pk, now):
+                return Job.objects.get(pk=pk)
+    return None
+
+
+def run_job(job):
+    func = _registry.get(job.task)
+    job.attempts += 1
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task {job.task!r}")
+        func(*job.args, **job.kwargs)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'Q'
+            job.run_at = timezone.now() + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1))
+            logger.warning("Job %s failed (attempt %s), retrying", job, job.attempts)
+        else:
+            job.status = 'F'
+            job.finished_at = timezone.now()
+            logger.error("Job %s failed permanently", job, exc_info=True)
+    else:
+        job.status = 'D'
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'attempts', 'run_at', 'last_error', 'finished_at'])
+    return job.status == 'D'
+
+
+def run_pending(limit=None):
+    """Run due jobs in this thread until none are left. Returns the count."""
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,215 @@
+"""
+Token-bucket rate limiting for the public form endpoints.
+
+Each (scope, client) pair has a bucket holding up to N tokens that refills
+at N per period; a throttled request costs one token. Rates are written
+like ``'5/m'`` (5 per minute; s, m, h and d are understood) and can be
+overridden per scope with the GREENTECH_RATELIMITS setting.
+
+Buckets live in the default cache so every process shares them. If the
+cache is unavailable they fall back to a dictionary in this process,
+which still stops a burst aimed at one worker. Reading and writing a
+bucket is not atomic, so concurrent requests may occasionally get one
+or two extra tokens; that is acceptable for throttling.
+
+The check runs before the view and, when keyed by IP address, before
+anything reads the session or the user from the database, so a throttled
+request is answered with a 429 and ``Retry-After`` almost for free.
+Async views check with acheck(), which uses the cache's aget/aset so the
+event loop is not blocked on a remote cache.
+"""
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'greentech:ratelimit:'
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+DEFAULT_RATES = {
+    'login': '10/m',
+    'signup': '5/m',
+    'contact': '5/m',
+    'report_issue': '5/m',
+    'feedback': '10/m',
+}
+
+# Entries kept by the in-process fallback before it starts over.
+MEMORY_LIMIT = 10000
+
+_memory = {}
+_memory_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """'5/m' -> (5, 60.0): bucket size and seconds to refill it completely."""
+    count, _, period = rate.partition('/')
+    number = period[:-1] or '1'
+    return int(count), float(number) * PERIODS[period[-1]]
+
+
+def get_rate(scope):
+    rates = {**DEFAULT_RATES, **getattr(settings, 'GREENTECH_RATELIMITS', {})}
+    return rates.get(scope)
+
+
+def client_ip(request):
+    """
+    The client's address. Behind N trusted reverse proxies
+    (GREENTECH_TRUSTED_PROXIES = N) it is the Nth address from the right
+    of X-Forwarded-For, the last one a proxy of ours added.
+    """
+    proxies = getattr(settings, 'GREENTECH_TRUSTED_PROXIES', 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')]
+        if len(forwarded) >= proxies and forwarded[-proxies]:
+            return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _load(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.warning("Rate limit cache unavailable; using in-process buckets.", exc_info=True)
+        return _memory.get(key)
+
+
+def _save(key, bucket, timeout):
+    try:
+        cache.set(key, bucket, timeout)
+    except Exception:
+        with _memory_lock:
+            if len(_memory) >= MEMORY_LIMIT:
+                _memory.clear()
+            _memory[key] = bucket
+
+
+async def _aload(key):
+    try:
+        return await cache.aget(key)
+    except Exception:
+        logger.warning("Rate limit cache unavailable; using in-process buckets.", exc_info=True)
+        return _memory.get(key)
+
+
+async def _asave(key, bucket, timeout):
+    try:
+        await cache.aset(key, bucket, timeout)
+    except Exception:
+        with _memory_lock:
+            if len(_memory) >= MEMORY_LIMIT:
+                _memory.clear()
+            _memory[key] = bucket
+
+
+def _bucket(scope, ident, rate, now):
+    size, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    return f'{KEY_PREFIX}{scope}:{ident}', size, period, now
+
+
+def _spend(bucket, size, period, now):
+    """(seconds to wait, None) if the bucket is empty, else (0, the bucket after taking a token)."""
+    refill = size / period
+    tokens, updated = bucket or (size, now)
+    tokens = min(size, tokens + (now - updated) * refill)
+    if tokens < 1:
+        return (1 - tokens) / refill, None
+    return 0, (tokens - 1, now)
+
+
+def take(scope, ident, rate, now=None):
+    """
+    Take a token from the bucket for ``ident`` in ``scope``. Returns 0 if
+    the request may go ahead, otherwise the seconds until a token is free.
+    """
+    key, size, period, now = _bucket(scope, ident, rate, now)
+    wait, bucket = _spend(_load(key), size, period, now)
+    if bucket is not None:
+        _save(key, bucket, math.ceil(period))
+    return wait
+
+
+async def atake(scope, ident, rate, now=None):
+    """take() for async views: the cache is read and written with aget/aset."""
+    key, size, period, now = _bucket(scope, ident, rate, now)
+    wait, bucket = _spend(await _aload(key), size, period, now)
+    if bucket is not None:
+        await _asave(key, bucket, math.ceil(period))
+    return wait
+
+
+def throttled_response(wait):
+    response = HttpResponse(
+        "Too many requests. Please wait a moment and try again.\n",
+        status=429, content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(max(1, math.ceil(wait)))
+    return response
+
+
+def _ident(request, rate, key, methods):
+    if not rate or request.method not in methods:
+        return None
+    ident = client_ip(request)
+    # key='user' reads the session and user, so it is only for (sync)
+    # views that load them anyway, such as login-only forms.
+    if key == 'user' and request.user.is_authenticated:
+        ident = f'user-{request.user.pk}'
+    return ident
+
+
+def check(request, scope, key='ip', methods=('POST',)):
+    """Return a 429 response if ``request`` is over the limit for ``scope``, else None."""
+    rate = get_rate(scope)
+    ident = _ident(request, rate, key, methods)
+    if ident is None:
+        return None
+    wait = take(scope, ident, rate)
+    return throttled_response(wait) if wait else None
+
+
+async def acheck(request, scope, key='ip', methods=('POST',)):
+    """check() for async views, without blocking the event loop on the cache."""
+    rate = get_rate(scope)
+    ident = _ident(request, rate, key, methods)
+    if ident is None:
+        return None
+    wait = await atake(scope, ident, rate)
+    return throttled_response(wait) if wait else None
+
+
+def ratelimit(scope, key='ip', methods=('POST',)):
+    """Decorator for function views (and ``as_view()`` results)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            return check(request, scope, key, methods) or view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+class RateLimitMixin:
+    """Throttle a class-based view; set ``ratelimit_scope``."""
+    ratelimit_scope = None
+    ratelimit_key = 'ip'
+    ratelimit_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._ratelimit_adispatch(request, *args, **kwargs)
+        response = check(request, self.ratelimit_scope, self.ratelimit_key, self.ratelimit_methods)
+        return response or super().dispatch(request, *args, **kwargs)
+
+    async def _ratelimit_adispatch(self, request, *args, **kwargs):
+        response = await acheck(request, self.ratelimit_scope, self.ratelimit_key, self.ratelimit_methods)
+        return response or await super().dispatch(request, *args, **kwargs)
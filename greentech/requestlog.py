@@ -0,0 +1,204 @@
+"""
+Per-request timing log and the reports built from it.
+
+``greentech.middleware.RequestLogMiddleware`` writes one JSON object per
+request to the ``greentech.requests`` logger: route, view, status, total,
+SQL and template time, query count and response size. Only a sample of
+requests is logged (GREENTECH_REQUEST_LOG_SAMPLE), but every request slower
+than GREENTECH_SLOW_REQUEST_MS is, together with its SQL statements and a
+profile of the Python stacks it spent its time in. Each line carries a
+``weight`` (1 / the chance it was logged) so reports over sampled logs are
+not skewed towards the slow requests that were always kept.
+
+``manage.py request_log_report`` turns the lines into per-view percentiles.
+"""
+import collections
+import contextlib
+import gzip
+import json
+import sys
+import threading
+import time
+
+# Seconds between stack samples of a slow request.
+SAMPLE_INTERVAL = 0.01
+
+# Stack samples kept per request, and frames per sample.
+MAX_SAMPLES = 1000
+MAX_DEPTH = 40
+
+# Stacks reported per slow request, most frequent first.
+PROFILE_STACKS = 20
+
+
+def _frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def _fold(frame):
+    """'module:function:line;...' from the outermost frame to ``frame``."""
+    parts = []
+    while frame is not None and len(parts) < MAX_DEPTH:
+        parts.append(_frame_name(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+def _fold_task(task, loop_frame):
+    """
+    The stack of an asyncio task: the event loop thread's stack while the
+    task runs, otherwise the chain of awaits it is suspended in.
+    """
+    coro = task.get_coro()
+    if getattr(coro, 'cr_running', False):
+        return _fold(loop_frame) if loop_frame is not None else None
+    parts = []
+    while coro is not None and len(parts) < MAX_DEPTH:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'ag_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        parts.append(_frame_name(frame))
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'ag_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return ';'.join(parts) or None
+
+
+class StackSampler:
+    """
+    Samples the stack of every request that has been running for longer
+    than ``threshold`` seconds, from one background thread, so requests
+    that stay fast pay only for two dictionary updates. The thread sleeps
+    until the oldest request reaches the threshold, and for as long as no
+    request is running. A request is its thread under WSGI and its asyncio
+    task under ASGI. The samples use the folded format flame graph tools
+    read.
+    """
+
+    def __init__(self, threshold, interval=SAMPLE_INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self._active = {}  # thread id or task -> (start, thread id, Counter of folded stacks)
+        self._lock = threading.Condition()  # notified when a request starts
+        self._thread = None
+
+    def start(self, task=None):
+        """Start sampling this thread, or ``task``; returns the key for stop()."""
+        key = threading.get_ident() if task is None else task
+        with self._lock:
+            self._active[key] = (time.perf_counter(), threading.get_ident(), collections.Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='greentech-stack-sampler', daemon=True)
+                self._thread.start()
+            self._lock.notify()
+        return key
+
+    def stop(self, key):
+        """Stop sampling; return [(folded stack, samples)], most frequent first."""
+        with self._lock:
+            _, _, samples = self._active.pop(key, (None, None, collections.Counter()))
+        return samples.most_common(PROFILE_STACKS)
+
+    def _wait_for_due(self):
+        """Block until a request is due for a sample, then return all that are."""
+        with self._lock:
+            while True:
+                now = time.perf_counter()
+                due, waits = [], []
+                for key, (start, thread, samples) in self._active.items():
+                    if now - start < self.threshold:
+                        waits.append(start + self.threshold - now)
+                    elif samples.total() < MAX_SAMPLES:
+                        due.append((key, thread, samples))
+                if due:
+                    return due
+                self._lock.wait(min(waits) if waits else None)
+
+    def _sample(self, due):
+        frames = sys._current_frames()
+        for key, thread, samples in due:
+            if isinstance(key, int):
+                frame = frames.get(thread)
+                stack = _fold(frame) if frame is not None else None
+            else:
+                stack = _fold_task(key, frames.get(thread))
+            if stack:
+                samples[stack] += 1
+
+    def _run(self):
+        while True:
+            self._sample(self._wait_for_due())
+            time.sleep(self.interval)
+
+
+def weighted_percentile(values, percent):
+    """``values`` is a list of (value, weight) sorted by value."""
+    total = sum(weight for _, weight in values)
+    if not total:
+        return None
+    target, seen = total * percent / 100, 0
+    for value, weight in values:
+        seen += weight
+        if seen >= target:
+            return value
+    return values[-1][0]
+
+
+def _open(path):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def read_lines(paths):
+    """Request log entries from ``paths`` ('-' is stdin; .gz is fine), skipping anything else."""
+    for path in paths:
+        with _open(path) as f:
+            for line in f:
+                # Tolerate a prefix (timestamp, level) from another formatter.
+                start = line.find('{')
+                if start == -1:
+                    continue
+                try:
+                    entry = json.loads(line[start:])
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and 'total_ms' in entry:
+                    yield entry
+
+
+def aggregate(entries, by='route', percentiles=(50, 90, 95, 99)):
+    """Per-``by`` rows of estimated request counts, latency percentiles and averages."""
+    groups = collections.defaultdict(list)
+    for entry in entries:
+        groups[entry.get(by) or '-'].append(entry)
+
+    rows = []
+    for key, group in groups.items():
+        weights = [entry.get('weight', 1) for entry in group]
+        total_weight = sum(weights)
+        times = sorted((entry['total_ms'], weight) for entry, weight in zip(group, weights))
+
+        def average(field):
+            pairs = [(entry.get(field), w) for entry, w in zip(group, weights) if entry.get(field) is not None]
+            if not pairs:
+                return None
+            return round(sum(value * w for value, w in pairs) / sum(w for _, w in pairs), 1)
+
+        row = {
+            by: key,
+            'requests': round(total_weight),
+            'logged': len(group),
+            'slow': sum(1 for entry in group if entry.get('slow')),
+            'errors': sum(1 for entry in group if entry.get('status', 0) >= 500),
+        }
+        for percent in percentiles:
+            row[f'p{percent}_ms'] = weighted_percentile(times, percent)
+        row['max_ms'] = times[-1][0]
+        row['time_s'] = round(sum(value * w for value, w in times) / 1000, 1)
+        row['sql_ms'] = average('sql_ms')
+        row['queries'] = average('queries')
+        row['template_ms'] = average('template_ms')
+        row['bytes'] = average('bytes')
+        rows.append(row)
+    return rows
@@ -0,0 +1,203 @@
+"""
+Full-text search for GreenPost.
+
+The active backend is chosen with the ``GREENTECH_SEARCH_BACKEND`` setting
+(a dotted path). When it is not set, SQLite databases use the FTS5 index
+created in migration 0014 and every other database falls back to a plain
+``icontains`` scan.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from .models import GreenPost
+
+FTS_TABLE = 'greentech_greenpost_fts'
+
+# Control characters never appear in user text, so they are safe to use as
+# highlight markers before the text is HTML-escaped.
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+@dataclass
+class SearchHit:
+    pk: int
+    rank: float
+    title: str
+    snippet: str
+
+
+def tokenize(query):
+    return _TOKEN_RE.findall(query.lower())
+
+
+def _render_marks(text):
+    """Escape ``text`` and turn the highlight markers into <mark> tags."""
+    html = escape(text)
+    html = html.replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+    return mark_safe(html)
+
+
+class BaseSearchBackend:
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, pk):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, limit=None, offset=0):
+        """Return a list of SearchHit ordered best match first."""
+        raise NotImplementedError
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Unindexed fallback that scans title and content with icontains."""
+
+    snippet_words = 30
+
+    def index(self, post):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def _highlight(self, text, terms):
+        if not terms:
+            return text
+        pattern = re.compile('|'.join(r'\b' + re.escape(t) + r'\w*' for t in terms), re.IGNORECASE)
+        return pattern.sub(lambda m: _MARK_START + m.group(0) + _MARK_END, text)
+
+    def search(self, query, limit=None, offset=0):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        qs = GreenPost.objects.all()
+        for term in terms:
+            qs = qs.filter(Q(title__icontains=term) | Q(content__icontains=term))
+        qs = qs.order_by('-created_at').values_list('pk', 'title', 'content')
+        stop = offset + limit if limit is not None else None
+        hits = []
+        for pk, title, content in qs[offset:stop]:
+            words = content.split()
+            snippet = ' '.join(words[:self.snippet_words])
+            if len(words) > self.snippet_words:
+                snippet += '…'
+            hits.append(SearchHit(
+                pk=pk,
+                rank=0.0,
+                title=_render_marks(self._highlight(title, terms)),
+                snippet=_render_marks(self._highlight(snippet, terms)),
+            ))
+        return hits
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """
+    Ranked search over an FTS5 virtual table.
+
+    Every query term is matched as a prefix, so "recyc" finds "recycling".
+    Title matches weigh more than content matches in the bm25 ranking.
+    """
+
+    title_weight = 10.0
+    content_weight = 1.0
+    snippet_tokens = 30
+
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)',
+                [post.pk, post.title, post.content],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, content) '
+                f'SELECT id, title, content FROM {GreenPost._meta.db_table}'
+            )
+
+    def match_expression(self, query):
+        # Quoting every token keeps FTS5 operators in user input inert.
+        return ' '.join(f'"{term}"*' for term in tokenize(query))
+
+    def search(self, query, limit=None, offset=0):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        sql = (
+            f'SELECT rowid, bm25({FTS_TABLE}, %s, %s) AS rank, '
+            f"highlight({FTS_TABLE}, 0, %s, %s), "
+            f"snippet({FTS_TABLE}, 1, %s, %s, '…', %s) "
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY rank LIMIT %s OFFSET %s'
+        )
+        params = [
+            self.title_weight, self.content_weight,
+            _MARK_START, _MARK_END,
+            _MARK_START, _MARK_END, self.snippet_tokens,
+            match, -1 if limit is None else limit, offset,
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        return [
+            SearchHit(pk=pk, rank=rank, title=_render_marks(title), snippet=_render_marks(snippet))
+            for pk, rank, title, snippet in rows
+        ]
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path):
+    return import_string(path)()
+
+
+def get_backend():
+    path = getattr(settings, 'GREENTECH_SEARCH_BACKEND', None)
+    if not path:
+        if connection.vendor == 'sqlite':
+            path = 'greentech.search.SQLiteFTSSearchBackend'
+        else:
+            path = 'greentech.search.DatabaseSearchBackend'
+    return _load_backend(path)
+
+
+def search_posts(query, limit=None, offset=0):
+    """
+    Return matching posts best match first, each carrying ``search_title``
+    and ``search_snippet`` with the matched terms wrapped in <mark>.
+    """
+    hits = get_backend().search(query, limit=limit, offset=offset)
+    posts = GreenPost.objects.select_related('author').in_bulk([hit.pk for hit in hits])
+    results = []
+    for hit in hits:
+        post = posts.get(hit.pk)
+        if post is None:
+            continue
+        post.search_rank = hit.rank
+        post.search_title = hit.title
+        post.search_snippet = hit.snippet
+        results.append(post)
+    return results
@@ -0,0 +1,75 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .caching import invalidate_event, invalidate_post
+from .counters import COUNTED_MODELS, adjust, counter_name, feedback_added, feedback_removed
+from .middleware import install_query_recorder
+from .models import GreenPost, Feedback, Event
+from .queue import enqueue
+from .tasks import index_post_task
+
+
+@receiver(post_save, sender=GreenPost)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'title', 'content'} & set(update_fields):
+        enqueue(index_post_task, instance.pk)
+
+
+@receiver(post_delete, sender=GreenPost)
+def unindex_post(sender, instance, **kwargs):
+    enqueue(index_post_task, instance.pk)
+
+
+@receiver(post_save, sender=GreenPost)
+@receiver(post_delete, sender=GreenPost)
+def invalidate_post_pages(sender, instance, **kwargs):
+    invalidate_post(instance.pk)
+
+
+@receiver(post_save, sender=Feedback)
+def count_feedback_added(sender, instance, created, **kwargs):
+    if created and instance.post_id:
+        feedback_added(instance.post_id)
+
+
+@receiver(post_delete, sender=Feedback)
+def count_feedback_removed(sender, instance, origin=None, **kwargs):
+    # Nothing to update when the feedback goes because its post was deleted.
+    deleting_posts = isinstance(origin, GreenPost) or getattr(origin, 'model', None) is GreenPost
+    if instance.post_id and not deleting_posts:
+        feedback_removed(instance.post_id)
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def invalidate_feedback_post(sender, instance, **kwargs):
+    if instance.post_id:
+        invalidate_post(instance.post_id)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def invalidate_event_pages(sender, instance, **kwargs):
+    invalidate_event(instance.pk)
+
+
+def count_created(sender, instance, created, **kwargs):
+    if created:
+        adjust(counter_name(sender), 1)
+
+
+def count_deleted(sender, instance, **kwargs):
+    adjust(counter_name(sender), -1)
+
+
+# Connected per model rather than globally: a post_delete listener on a
+# model stops Django from fast-deleting its rows during cascades.
+for label in COUNTED_MODELS.values():
+    post_save.connect(count_created, sender=label, dispatch_uid=f'count_created:{label}')
+    post_delete.connect(count_deleted, sender=label, dispatch_uid=f'count_deleted:{label}')
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
@@ -0,0 +1,92 @@
+"""
+Static files build for production.
+
+``collectstatic`` with CompressedManifestStaticFilesStorage:
+
+* minifies our own CSS (vendored files ship minified as ``*.min.*`` and
+  are left alone),
+* gives every file a content-hashed name through the manifest storage, so
+  a changed file always gets a new URL,
+* writes ``.gz`` and, when the optional ``brotli`` package is installed,
+  ``.br`` siblings next to each compressible file.
+
+``greentech.middleware.StaticFilesMiddleware`` serves the result with the
+best encoding the browser accepts and far-future immutable caching for
+hashed names.
+"""
+import gzip
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map', '.ico')
+
+# Only keep a compressed copy when it saves at least this fraction.
+MIN_SAVING = 0.05
+
+
+def minify_css(css):
+    # Conservative: comments and layout whitespace only, so it is safe for
+    # stylesheets without whitespace-sensitive strings. /*! ... */ licence
+    # comments are kept. Spaces before ':' are left alone because
+    # ".nav :hover" and ".nav:hover" are different selectors.
+    css = re.sub(r'/\*(?!!).*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def compress(content):
+    """Return {extension: bytes} for the encodings worth keeping."""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return {
+        ext: data for ext, data in variants.items()
+        if len(data) <= len(content) * (1 - MIN_SAVING)
+    }
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+
+        # Minify the copies collected into STATIC_ROOT and hash those, so
+        # the hashed names describe the minified content.
+        paths = dict(paths)
+        for path in paths:
+            if path.lower().endswith('.css') and '.min.' not in path:
+                with self.open(path) as f:
+                    content = f.read().decode('utf-8')
+                self._replace(path, minify_css(content).encode('utf-8'))
+                paths[path] = (self, path)
+
+        # CSS is hashed over several passes; only the last name counts.
+        final = {}
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not isinstance(processed, Exception) and hashed_name:
+                final[name] = hashed_name
+            yield name, hashed_name, processed
+        for name, hashed_name in final.items():
+            self._compress(name)
+            self._compress(hashed_name)
+
+    def _replace(self, path, content):
+        self.delete(path)
+        self._save(path, ContentFile(content))
+
+    def _compress(self, path):
+        if not path.lower().endswith(COMPRESSIBLE) or not self.exists(path):
+            return
+        with self.open(path) as f:
+            content = f.read()
+        for ext, data in compress(content).items():
+            self._replace(path + ext, data)
@@ -0,0 +1,37 @@
+"""
+Work that runs on the job queue instead of in the request.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+
+from .images import process_post_image
+from .models import GreenPost
+from .queue import task
+from .search import get_backend
+
+
+@task
+def process_post_image_task(post_id):
+    post = GreenPost.objects.filter(pk=post_id).first()
+    if post is not None:
+        process_post_image(post)
+
+
+@task
+def index_post_task(post_id):
+    post = GreenPost.objects.filter(pk=post_id).only('pk', 'title', 'content').first()
+    if post is None:
+        get_backend().remove(post_id)
+    else:
+        get_backend().index(post)
+
+
+@task(max_attempts=5)
+def notify_staff(subject, message):
+    recipients = list(
+        User.objects.filter(is_staff=True, is_active=True)
+        .exclude(email='').values_list('email', flat=True)
+    )
+    if recipients:
+        send_mail(f"[GreenTech] {subject}", message, settings.DEFAULT_FROM_EMAIL, recipients)
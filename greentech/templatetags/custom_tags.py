@@ -1,7 +1,47 @@
 from django import template
+from django.core.files.storage import default_storage
 
 register = template.Library()
 
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+
+
 @register.filter
 def get_item(dictionary, key):
     return dictionary.get(key)
+
+
+@register.inclusion_tag('greentech/post_picture.html')
+def post_picture(post, variant='card', sizes='100vw', css_class='', style=''):
+    """
+    <picture> for a post image with a srcset per format, falling back to
+    the original upload for posts whose variants have not been generated.
+    """
+    context = {'post': post, 'css_class': css_class, 'style': style, 'sizes': sizes}
+    variants = sorted((post.image_variants or {}).values(), key=lambda v: v['width'])
+    if not variants:
+        context.update({
+            'src': post.image.url,
+            'width': post.image_width,
+            'height': post.image_height,
+            'sources': [],
+        })
+        return context
+
+    chosen = (post.image_variants.get(variant) or variants[-1])
+    formats = [fmt for fmt in MIME_TYPES if fmt in chosen]
+
+    def srcset(fmt):
+        return ', '.join(f"{default_storage.url(v[fmt])} {v['width']}w" for v in variants if v.get(fmt))
+
+    context.update({
+        'src': default_storage.url(chosen['jpeg']),
+        'srcset': srcset('jpeg'),
+        'width': chosen['width'],
+        'height': chosen['height'],
+        'sources': [
+            {'type': MIME_TYPES[fmt], 'srcset': srcset(fmt)}
+            for fmt in formats if fmt != 'jpeg'
+        ],
+    })
+    return context
@@ -0,0 +1,54 @@
+"""
+Test helpers for keeping an eye on how many SQL queries each page issues.
+"""
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+
+def url_names(urlconf_module):
+    """All named routes in ``urlconf_module``, including nested includes."""
+    names = set()
+
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns)
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                names.add(pattern.name)
+
+    walk(urlconf_module.urlpatterns)
+    return names
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for django.test.TestCase.
+
+    ``query_budgets`` maps URL names to the most queries the page may run.
+    """
+    query_budgets = {}
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=connection):
+        with CaptureQueriesContext(using) as ctx:
+            yield ctx
+        if len(ctx) > budget:
+            statements = '\n'.join(
+                f"{i}. {query['sql']}" for i, query in enumerate(ctx.captured_queries, 1)
+            )
+            self.fail(f"{len(ctx)} queries executed, budget is {budget}:\n{statements}")
+
+    def assertWithinQueryBudget(self, url_name, *args, method='get', data=None,
+                                status_code=200, client=None, **kwargs):
+        """Request ``url_name`` and check it against its budget."""
+        if url_name not in self.query_budgets:
+            self.fail(f"No query budget declared for '{url_name}'.")
+        client = client or self.client
+        url = reverse(url_name, args=args, kwargs=kwargs or None)
+        with self.assertMaxQueries(self.query_budgets[url_name]):
+            response = getattr(client, method)(url, data)
+        self.assertEqual(response.status_code, status_code, f"{method.upper()} {url}")
+        return response
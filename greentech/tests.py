@@ -1,3 +1,1529 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from . import urls
+from .benchmarks import DEFAULT_SIZES, SKIPPED, ClientRunner, generate, run_benchmark, targets
+from .counters import get_counts, reconcile
+from .ical import fold
+from .images import process_post_image
+from .imports import import_rows, read_rows
+from .pagination import encode_cursor, keyset_paginate
+from .queue import claim_next, enqueue, run_pending, task
+from .ratelimit import atake, client_ip, take
+from .requestlog import StackSampler, aggregate
+from .search import search_posts
+from .staticfiles import minify_css
+from .visits import FLUSH_PREFIX, flush_visits, get_visits, record_visit
+from .models import (
+    GreenPost, ContactMessage, Feedback,
+    VolunteerRequest, ReportIssue, SiteCounter, Job, ModerationLog,
+    Event, VolunteerApplication
+)
+from .testing import QueryBudgetMixin, url_names
+from .views import AboutView
+
+# Keep request log lines out of the test output; RequestLogTests use assertLogs.
+logging.getLogger('greentech.requests').setLevel(logging.CRITICAL)
+
+# Maximum number of SQL queries per route, measured with several rows in
+# every table so that per-row (N+1) queries push a page over its budget.
+# Session and user lookups for logged-in requests are included.
+QUERY_BUDGETS = {
+    # Home & Posts
+    'home': 4,
+    'add_post': 2,
+    'post_detail': 4,
+    'admin_post_list': 3,
+    'delete_post': 10,
+
+    # Authentication
+    'signup': 1,
+    'login': 9,
+    'logout': 4,
+
+    # Contact
+    'contact': 2,
+    'contact_messages': 3,
+    'export': 2,  # rows are read while the response streams, after the view returns
+
+    # About
+    'about': 1,
+
+    # Feedback
+    'feedback': 2,
+    'feedback_list': 3,
+    'delete_feedback': 6,  # includes the post's feedback_count update
+
+    # Volunteers
+    'volunteer': 3,
+    'volunteer_requests': 3,
+    'accept_volunteer': 8,  # moderate(): savepoint, select, update, audit insert
+    'deny_volunteer': 8,
+    'bulk_moderate_volunteers': 7,
+
+    # Suggestions & Issues
+    'report_issue': 1,
+
+    # Dashboard & Users
+    'dashboard': 3,
+    'user_list': 3,
+    'delete_user': 14,
+
+    # Event
+    'event_list': 5,  # session, user, events with the user's status, volunteer request, first date
+    'event_calendar': 2,  # versions, then only the events not in the cache
+    'add_event': 1,
+    'event_detail': 3,
+    'apply_volunteer': 3,
+    'admin_event_list': 4,
+    'accept_event_volunteer': 8,
+    'deny_event_volunteer': 8,
+    'bulk_moderate_event_volunteers': 7,
+
+    # JSON API (all fields requested)
+    'api_post_list': 2,  # posts, then recent feedback for the page
+    'api_post_detail': 2,
+    'api_event_list': 1,
+    'api_event_detail': 1,
+    'api_feedback_list': 1,
+    'api_feedback_detail': 1,
+}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    query_budgets = QUERY_BUDGETS
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pw', is_staff=True)
+        cls.member = User.objects.create_user('member', 'member@example.com', 'pw')
+        cls.volunteer = User.objects.create_user('volunteer', 'volunteer@example.com', 'pw')
+        authors = [User.objects.create_user(f'author{i}', f'author{i}@example.com', 'pw') for i in range(3)]
+
+        VolunteerRequest.objects.create(
+            user=cls.volunteer, name='Volunteer', email='volunteer@example.com',
+            phone_number='555', area_of_interest='Trees', availability='Weekends', status='A',
+        )
+        for i, author in enumerate(authors):
+            VolunteerRequest.objects.create(
+                user=author, name=author.username, email=author.email,
+                phone_number='555', area_of_interest='Solar', availability='Evenings',
+            )
+            post = GreenPost.objects.create(title=f'Post {i}', content='Plant more trees.', author=author)
+            for commenter in authors:
+                Feedback.objects.create(user=commenter, post=post, feedback='Nice!')
+            event = Event.objects.create(
+                title=f'Event {i}', description='Cleanup', date=datetime.date(2030, 1, i + 1),
+                location='Park', created_by=author,
+            )
+            for applicant in authors:
+                VolunteerApplication.objects.create(
+                    event=event, user=applicant, name=applicant.username,
+                    email=applicant.email, motivation='Help out',
+                )
+            ContactMessage.objects.create(name=f'Sender {i}', email='sender@example.com', message='Hi')
+            ReportIssue.objects.create(name=f'Reporter {i}', issue='Litter')
+
+        cls.post = GreenPost.objects.first()
+        cls.event = Event.objects.first()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(url_names(urls) - set(QUERY_BUDGETS), set())
+
+    def test_anonymous_pages(self):
+        for name, args in [
+            ('home', ()), ('post_detail', (self.post.pk,)), ('about', ()),
+            ('signup', ()), ('event_list', ()), ('event_detail', (self.event.pk,)),
+            ('add_event', ()), ('report_issue', ()), ('event_calendar', ()),
+            ('api_post_list', ()), ('api_post_detail', (self.post.pk,)),
+            ('api_event_list', ()), ('api_event_detail', (self.event.pk,)),
+            ('api_feedback_list', ()), ('api_feedback_detail', (Feedback.objects.first().pk,)),
+        ]:
+            with self.subTest(name):
+                self.assertWithinQueryBudget(name, *args)
+
+    def test_member_pages(self):
+        self.client.force_login(self.member)
+        for name, args in [
+            ('home', ()), ('post_detail', (self.post.pk,)), ('add_post', ()),
+            ('contact', ()), ('feedback', ()), ('volunteer', ()),
+            ('event_list', ()), ('event_detail', (self.event.pk,)),
+        ]:
+            with self.subTest(name):
+                self.assertWithinQueryBudget(name, *args)
+
+    def test_volunteer_pages(self):
+        self.client.force_login(self.volunteer)
+        for name, args, status_code in [
+            ('event_list', (), 200),
+            ('apply_volunteer', (), 200),
+            ('volunteer', (), 302),
+        ]:
+            with self.subTest(name):
+                self.assertWithinQueryBudget(name, *args, status_code=status_code)
+
+    def test_staff_pages(self):
+        self.client.force_login(self.staff)
+        for name in [
+            'dashboard', 'admin_post_list', 'contact_messages', 'feedback_list',
+            'volunteer_requests', 'user_list', 'admin_event_list',
+        ]:
+            with self.subTest(name):
+                self.assertWithinQueryBudget(name)
+        self.assertWithinQueryBudget('export', name='contacts', fmt='csv')
+
+    def test_staff_actions(self):
+        self.client.force_login(self.staff)
+        request = VolunteerRequest.objects.filter(status='P').first()
+        application = VolunteerApplication.objects.first()
+        for name, pk in [
+            ('accept_volunteer', request.pk),
+            ('deny_volunteer', request.pk),
+            ('accept_event_volunteer', application.pk),
+            ('deny_event_volunteer', application.pk),
+            ('delete_feedback', Feedback.objects.first().pk),
+            ('delete_post', self.post.pk),
+            ('delete_user', self.member.pk),
+        ]:
+            with self.subTest(name):
+                self.assertWithinQueryBudget(name, pk, method='post', status_code=302)
+
+        # One UPDATE and one audit INSERT however many rows are selected
+        for name, model in [
+            ('bulk_moderate_volunteers', VolunteerRequest),
+            ('bulk_moderate_event_volunteers', VolunteerApplication),
+        ]:
+            with self.subTest(name):
+                ids = list(model.objects.values_list('pk', flat=True))
+                self.assertWithinQueryBudget(
+                    name, method='post', data={'action': 'deny', 'ids': ids}, status_code=302,
+                )
+
+    def test_login_and_logout(self):
+        self.assertWithinQueryBudget(
+            'login', method='post', status_code=302,
+            data={'username': 'member', 'password': 'pw'},
+        )
+        self.assertWithinQueryBudget('logout', method='post', status_code=302)
+
+    def test_budget_failure_lists_queries(self):
+        with self.assertRaisesMessage(AssertionError, '1 queries executed, budget is 0'):
+            with self.assertMaxQueries(0):
+                GreenPost.objects.count()
+
+
+class QueryCountMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_stats_attached_to_request(self):
+        response = self.client.get('/about/')
+        self.assertEqual(response.wsgi_request.query_stats.count, 0)
+        response = self.client.get('/')
+        self.assertGreater(response.wsgi_request.query_stats.count, 0)
+
+    @override_settings(DEBUG=True)
+    def test_server_timing_header_in_debug(self):
+        response = self.client.get('/')
+        header = response['Server-Timing']
+        self.assertIn('total;dur=', header)
+        self.assertIn('db;dur=', header)
+        self.assertIn('sql-1;dur=', header)
+
+    def test_no_server_timing_header_without_debug(self):
+        response = self.client.get('/')
+        self.assertNotIn('Server-Timing', response)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+        GreenPost.objects.create(title='Rain gardens', content='Soak up storm water.', author=cls.author)
+        GreenPost.objects.create(
+            title='Storm drains', content='Rain barrels and rain gardens near the drains.', author=cls.author,
+        )
+        run_pending()
+
+    def titles(self, query):
+        return [post.title for post in search_posts(query)]
+
+    def test_title_ranks_above_content(self):
+        self.assertEqual(self.titles('rain'), ['Rain gardens', 'Storm drains'])
+        self.assertEqual(self.titles('storm'), ['Storm drains', 'Rain gardens'])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.titles('gard'), ['Rain gardens', 'Storm drains'])
+        self.assertEqual(self.titles('barr'), ['Storm drains'])
+        self.assertEqual(self.titles('rain barr'), ['Storm drains'])
+
+    def test_fts_operators_are_inert(self):
+        self.assertEqual(self.titles('"rain'), ['Rain gardens', 'Storm drains'])
+        self.assertEqual(self.titles('rain*'), ['Rain gardens', 'Storm drains'])
+        self.assertEqual(self.titles('rain -gardens'), ['Rain gardens', 'Storm drains'])
+        # As FTS5 syntax these would match both posts; as words they match
+        # only the post that contains "near", and no post contains "or".
+        self.assertEqual(self.titles('NEAR(rain storm)'), ['Storm drains'])
+        self.assertEqual(self.titles('rain OR zebra'), [])
+        self.assertEqual(self.titles('* - "'), [])
+
+    def test_highlight_is_escaped(self):
+        GreenPost.objects.create(title='Rain <script>alert(1)</script>', content='a & b', author=self.author)
+        run_pending()
+        post = search_posts('alert')[0]
+        self.assertEqual(post.search_title, 'Rain &lt;script&gt;<mark>alert</mark>(1)&lt;/script&gt;')
+        self.assertEqual(post.search_snippet, 'a &amp; b')
+
+    def test_index_follows_save_edit_and_delete(self):
+        post = GreenPost.objects.create(title='Compost bins', content='Kitchen scraps.', author=self.author)
+        self.assertEqual(self.titles('compost'), [])  # queued, not yet indexed
+        run_pending()
+        self.assertEqual(self.titles('compost'), ['Compost bins'])
+
+        post.title = 'Worm farms'
+        post.save()
+        run_pending()
+        self.assertEqual(self.titles('compost'), [])
+        self.assertEqual(self.titles('worm'), ['Worm farms'])
+
+        post.delete()
+        run_pending()
+        self.assertEqual(self.titles('worm'), [])
+
+
+class KeysetPaginationTests(TestCase):
+    ordering = ['-created_at', '-pk']
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author', password='pw')
+        for i in range(5):
+            GreenPost.objects.create(title=f'Post {i}', content='Text', author=author)
+        # Posts 1-3 share a timestamp, so only the pk tells them apart.
+        same = timezone.now()
+        GreenPost.objects.filter(title__in=['Post 1', 'Post 2', 'Post 3']).update(created_at=same)
+        GreenPost.objects.filter(title='Post 0').update(created_at=same - datetime.timedelta(hours=1))
+        GreenPost.objects.filter(title='Post 4').update(created_at=same + datetime.timedelta(hours=1))
+
+    def page(self, cursor=None):
+        return keyset_paginate(GreenPost.objects.all(), self.ordering, 2, cursor)
+
+    def titles(self, page):
+        return [post.title for post in page]
+
+    def test_forward_and_back_across_ties(self):
+        first = self.page()
+        self.assertEqual(self.titles(first), ['Post 4', 'Post 3'])
+        self.assertIsNone(first.previous_cursor)
+        second = self.page(first.next_cursor)
+        self.assertEqual(self.titles(second), ['Post 2', 'Post 1'])
+        last = self.page(second.next_cursor)
+        self.assertEqual(self.titles(last), ['Post 0'])
+        self.assertIsNone(last.next_cursor)
+
+        back = self.page(last.previous_cursor)
+        self.assertEqual(self.titles(back), ['Post 2', 'Post 1'])
+        self.assertEqual(self.titles(self.page(back.next_cursor)), ['Post 0'])
+        start = self.page(back.previous_cursor)
+        self.assertEqual(self.titles(start), ['Post 4', 'Post 3'])
+        self.assertIsNone(start.previous_cursor)
+        self.assertEqual(self.titles(self.page(start.next_cursor)), ['Post 2', 'Post 1'])
+
+    def test_single_page_has_no_cursors(self):
+        page = keyset_paginate(GreenPost.objects.all(), self.ordering, 10)
+        self.assertEqual(len(page), 5)
+        self.assertFalse(page.has_other_pages())
+
+    def test_bad_cursor_is_404(self):
+        cache.clear()
+        post = GreenPost.objects.first()
+        key = [post.created_at.isoformat(), str(post.pk)]
+        for cursor in (
+            'not-a-cursor!', encode_cursor(['n']), encode_cursor({'d': 'x', 'k': key}),
+            encode_cursor({'d': 'n', 'k': key[:1]}), encode_cursor({'d': 'n', 'k': ['yesterday', 'one']}),
+            encode_cursor({'d': 'n'}),
+        ):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/', {'cursor': cursor}).status_code, 404)
+        self.assertEqual(self.client.get('/', {'cursor': encode_cursor({'d': 'n', 'k': key})}).status_code, 200)
+
+
+class AdminEventListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        today = datetime.date.today()
+        busy = Event.objects.create(
+            title='Beach clean-up', description='Bring gloves.', date=today,
+            location='Shore', created_by=cls.staff,
+        )
+        Event.objects.create(
+            title='Tree planting', description='Bring a spade.', date=today - datetime.timedelta(days=1),
+            location='Park', created_by=cls.staff,
+        )
+        for i, status in enumerate('PPAD'):
+            VolunteerApplication.objects.create(
+                event=busy, name=f'Volunteer {i}', email=f'v{i}@example.com',
+                motivation='Happy to help.', status=status,
+            )
+
+    def test_counts_applications_by_status(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/admin-events/')
+        self.assertEqual(response.status_code, 200)
+        counts = {
+            event.title: (event.pending_count, event.accepted_count, event.denied_count)
+            for event in response.context['events']
+        }
+        self.assertEqual(counts, {'Beach clean-up': (2, 1, 1), 'Tree planting': (0, 0, 0)})
+        self.assertContains(response, '2 pending')
+
+    def test_staff_only(self):
+        member = User.objects.create_user('member', password='pw')
+        self.client.force_login(member)
+        self.assertEqual(self.client.get('/admin-events/').status_code, 302)
+
+
+class SiteCounterTests(TestCase):
+    def test_counts_follow_creates_and_deletes(self):
+        user = User.objects.create_user('author', password='pw')
+        post = GreenPost.objects.create(title='Post', content='Text', author=user)
+        Feedback.objects.create(user=user, post=post, feedback='Nice')
+        self.assertEqual(get_counts()['posts'], 1)
+        self.assertEqual(get_counts()['feedbacks'], 1)
+        self.assertEqual(get_counts()['users'], 1)
+
+        user.delete()  # cascades to the post and its feedback
+        counts = get_counts()
+        self.assertEqual((counts['posts'], counts['feedbacks'], counts['users']), (0, 0, 0))
+
+    def test_reconcile_fixes_drift(self):
+        ContactMessage.objects.bulk_create([
+            ContactMessage(name='A', email='a@example.com', message='Hi'),
+            ContactMessage(name='B', email='b@example.com', message='Hi'),
+        ])
+        self.assertEqual(get_counts()['contacts'], 0)
+        reconcile()
+        self.assertEqual(get_counts()['contacts'], 2)
+
+    def test_missing_counter_is_recounted(self):
+        ReportIssue.objects.create(name='A', issue='Litter')
+        SiteCounter.objects.filter(name='issues').delete()
+        self.assertEqual(get_counts()['issues'], 1)
+
+
+class VisitCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_views_buffered_and_flushed(self):
+        self.assertEqual(record_visit('home'), 1)
+        with self.assertNumQueries(0):
+            for _ in range(4):
+                total = record_visit('home')
+        self.assertEqual(total, 5)
+        self.assertFalse(SiteCounter.objects.filter(name='visits_home').exists())
+        self.assertEqual(flush_visits('home'), 5)
+        self.assertEqual(SiteCounter.objects.get(name='visits_home').value, 5)
+        self.assertEqual(get_visits('home'), 5)
+
+    def test_flushed_once_per_interval(self):
+        record_visit('home')
+        record_visit('home')
+        cache.delete(FLUSH_PREFIX + 'home')  # the interval has passed
+        record_visit('home')
+        self.assertEqual(SiteCounter.objects.get(name='visits_home').value, 3)
+        self.assertEqual(record_visit('home'), 4)
+
+    def test_home_page_does_not_write_session(self):
+        self.client.get('/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(get_visits('home'), 2)
+
+
+class FeedbackStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+        cls.quiet = GreenPost.objects.create(title='Quiet', content='Text', author=cls.author)
+        cls.busy = GreenPost.objects.create(title='Busy', content='Text', author=cls.author)
+
+    def test_counts_follow_feedback(self):
+        first = Feedback.objects.create(user=self.author, post=self.busy, feedback='One')
+        second = Feedback.objects.create(user=self.author, post=self.busy, feedback='Two')
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.feedback_count, 2)
+        self.assertEqual(self.busy.last_feedback_at, second.created_at)
+        second.delete()
+        self.busy.refresh_from_db()
+        self.assertEqual((self.busy.feedback_count, self.busy.last_feedback_at), (1, first.created_at))
+        first.delete()
+        self.busy.refresh_from_db()
+        self.assertEqual((self.busy.feedback_count, self.busy.last_feedback_at), (0, None))
+
+    def test_backfill_command(self):
+        Feedback.objects.bulk_create([
+            Feedback(user=self.author, post=self.busy, feedback=str(i)) for i in range(3)
+        ])
+        out = io.StringIO()
+        call_command('backfill_feedback_stats', stdout=out)
+        self.assertIn('2 post(s)', out.getvalue())
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.feedback_count, 3)
+        self.assertIsNotNone(self.busy.last_feedback_at)
+
+    def test_most_discussed_ordering(self):
+        Feedback.objects.create(user=self.author, post=self.busy, feedback='One')
+        cache.clear()
+        response = self.client.get('/?sort=discussed')
+        self.assertEqual([post.title for post in response.context['posts']], ['Busy', 'Quiet'])
+        self.assertContains(response, '1 comment |')
+        self.assertEqual(self.client.get('/?sort=random').status_code, 404)
+
+
+class DuplicateApplicationMigrationTests(TransactionTestCase):
+    before = [('greentech', '0017_job')]
+    after = [('greentech', '0018_hot_column_indexes')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_keeps_furthest_status_then_earliest(self):
+        apps = self.migrate(self.before)
+        User = apps.get_model('auth', 'User')
+        Event = apps.get_model('greentech', 'Event')
+        Application = apps.get_model('greentech', 'VolunteerApplication')
+        user = User.objects.create(username='volunteer')
+        events = [
+            Event.objects.create(
+                title=f'Event {i}', description='', date=datetime.date(2030, 1, 1), location='Park', created_by=user,
+            )
+            for i in range(3)
+        ]
+        now = timezone.now()
+
+        def apply(event, status, minutes):
+            application = Application.objects.create(
+                event=event, user=user, name='V', email='v@example.com', motivation='Help', status=status,
+            )
+            Application.objects.filter(pk=application.pk).update(created_at=now + datetime.timedelta(minutes=minutes))
+            return application.pk
+
+        apply(events[0], 'P', 0)
+        accepted = apply(events[0], 'A', 5)
+        apply(events[0], 'D', 1)
+        apply(events[1], 'D', 3)
+        first_denied = apply(events[1], 'D', 2)
+        apply(events[1], 'P', 1)
+        only = apply(events[2], 'P', 0)
+
+        apps = self.migrate(self.after)
+        kept = apps.get_model('greentech', 'VolunteerApplication').objects.values_list('pk', flat=True)
+        self.assertEqual(sorted(kept), sorted([accepted, first_denied, only]))
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+        cls.post = GreenPost.objects.create(title='Post', content='Text', author=cls.author)
+        cls.event = Event.objects.create(
+            title='Cleanup', description='Beach', date=datetime.date(2030, 1, 1),
+            location='Beach', created_by=cls.author,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_page_served_from_cache(self):
+        url = f'/post/{self.post.pk}/'
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertContains(response, 'Post')
+
+    def test_feedback_invalidates_post_page(self):
+        url = f'/post/{self.post.pk}/'
+        self.client.get(url)
+        Feedback.objects.create(user=self.author, post=self.post, feedback='Fresh feedback')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Fresh feedback')
+
+    def test_event_save_invalidates_event_pages(self):
+        self.client.get('/events/')
+        self.client.get(f'/events/{self.event.pk}/')
+        self.event.title = 'Renamed cleanup'
+        self.event.save()
+        self.assertContains(self.client.get('/events/'), 'Renamed cleanup')
+        self.assertContains(self.client.get(f'/events/{self.event.pk}/'), 'Renamed cleanup')
+
+    def test_logged_in_pages_not_cached(self):
+        self.client.force_login(self.author)
+        response = self.client.get(f'/post/{self.post.pk}/')
+        self.assertNotIn('X-Page-Cache', response)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+        cls.post = GreenPost.objects.create(title='Post', content='Text', author=cls.author)
+        cls.event = Event.objects.create(
+            title='Cleanup', description='Beach', date=datetime.date(2030, 1, 1),
+            location='Beach', created_by=cls.author,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_matching_etag_is_304_without_rendering(self):
+        for url in (f'/post/{self.post.pk}/', f'/events/{self.event.pk}/'):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertIn('no-cache', first['Cache-Control'])
+                cache.clear()
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+                self.assertEqual(response['ETag'], first['ETag'])
+
+    def test_cached_page_answers_304(self):
+        url = f'/post/{self.post.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since(self):
+        url = f'/events/{self.event.pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+    def test_feedback_changes_post_etag(self):
+        url = f'/post/{self.post.pk}/'
+        etag = self.client.get(url)['ETag']
+        Feedback.objects.create(user=self.author, post=self.post, feedback='New')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_post_edit_changes_etag(self):
+        url = f'/post/{self.post.pk}/'
+        first = self.client.get(url)
+        self.post.title = 'Edited'
+        self.post.save()
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=first['ETag'], HTTP_IF_MODIFIED_SINCE=first['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Edited')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_event_save_changes_etag(self):
+        url = f'/events/{self.event.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.event.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_user(self):
+        url = f'/post/{self.post.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_gzipped_response_still_validates(self):
+        url = f'/post/{self.post.pk}/'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        cache.clear()
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class APITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+        cls.posts = [
+            GreenPost.objects.create(title=f'Post {i}', content='Text', author=cls.author)
+            for i in range(3)
+        ]
+        for i in range(5):
+            Feedback.objects.create(user=cls.author, post=cls.posts[0], feedback=f'Reply {i}')
+        Feedback.objects.create(user=cls.author, feedback='Private site feedback')
+        cls.event = Event.objects.create(
+            title='Cleanup', description='Beach', date=datetime.date(2030, 1, 1),
+            location='Beach', created_by=cls.author,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_list_pages_with_cursor(self):
+        data = self.client.get('/api/v1/posts/?limit=2').json()
+        self.assertEqual([p['title'] for p in data['results']], ['Post 2', 'Post 1'])
+        self.assertIsNone(data['previous'])
+        data = self.client.get(data['next']).json()
+        self.assertEqual([p['title'] for p in data['results']], ['Post 0'])
+        self.assertIsNone(data['next'])
+
+    def test_sparse_fields_limit_the_query(self):
+        with self.assertNumQueries(1) as ctx:
+            data = self.client.get('/api/v1/posts/?fields=id,title').json()
+        self.assertEqual(set(data['results'][0]), {'id', 'title'})
+        self.assertNotIn('"content"', ctx.captured_queries[0]['sql'])
+
+    def test_related_fields(self):
+        data = self.client.get(
+            f'/api/v1/posts/{self.posts[0].pk}/?fields=author,feedback_count,recent_feedback'
+        ).json()
+        self.assertEqual(data['author'], 'author')
+        self.assertEqual(data['feedback_count'], 5)
+        self.assertEqual([fb['feedback'] for fb in data['recent_feedback']], ['Reply 4', 'Reply 3', 'Reply 2'])
+
+    def test_feedback_excludes_site_feedback(self):
+        data = self.client.get(f'/api/v1/feedback/?post={self.posts[0].pk}&limit=100').json()
+        self.assertEqual(len(data['results']), 5)
+        private = Feedback.objects.get(post=None)
+        self.assertEqual(self.client.get(f'/api/v1/feedback/{private.pk}/').status_code, 404)
+        self.assertEqual(len(self.client.get('/api/v1/feedback/?limit=100').json()['results']), 5)
+
+    def test_errors_are_json(self):
+        for url, status in [
+            ('/api/v1/posts/?fields=id,secret', 400),
+            ('/api/v1/posts/?limit=1000', 400),
+            ('/api/v1/posts/?cursor=bogus', 404),
+            ('/api/v1/events/999999/', 404),
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', response.json())
+
+    def test_etag_and_cache(self):
+        url = f'/api/v1/events/{self.event.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.json()['title'], 'Cleanup')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.event.title = 'Renamed'
+        self.event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.json()['title'], 'Renamed')
+
+
+class EventWindowTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+        today = timezone.localdate()
+        cls.today = today
+        for title, date in [
+            ('Past', today - datetime.timedelta(days=400)),
+            ('Recent', today - datetime.timedelta(days=10)),
+            ('Today', today),
+            ('Next year', today + datetime.timedelta(days=400)),
+        ]:
+            Event.objects.create(
+                title=title, description='Bring gloves; bags, too.\nMeet at the gate.',
+                date=date, location='Park', created_by=cls.author,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def titles(self, url):
+        cache.clear()
+        return [event.title for event in self.client.get(url).context['events']]
+
+    def test_windows(self):
+        self.assertEqual(self.titles('/events/'), ['Today', 'Next year'])
+        past = self.today - datetime.timedelta(days=400)
+        self.assertEqual(self.titles(f'/events/?year={past.year}')[-1], 'Past')
+        self.assertIn('Today', self.titles('/events/?when=month'))
+        self.assertNotIn('Next year', self.titles('/events/?when=month'))
+        self.assertEqual(self.client.get('/events/?when=someday').status_code, 404)
+        self.assertEqual(self.client.get('/events/?year=abc').status_code, 404)
+
+    def test_window_is_paginated(self):
+        Event.objects.bulk_create([
+            Event(title=f'Future {i}', description='', date=datetime.date(2040, 1, i + 1),
+                  location='Park', created_by=self.author)
+            for i in range(25)
+        ])
+        response = self.client.get('/events/?year=2040')
+        self.assertEqual(len(response.context['events']), 20)
+        self.assertEqual(response.context['events'][0].title, 'Future 24')
+        response = self.client.get(f"/events/?year=2040&cursor={response.context['page_obj'].next_cursor}")
+        self.assertEqual([e.title for e in response.context['events']][-1], 'Future 0')
+        self.assertContains(response, '?year=2040&amp;cursor=')
+
+    def test_calendar_feed(self):
+        response = self.client.get('/events/calendar.ics')
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(body.count('BEGIN:VEVENT'), 3)  # "Past" is too old
+        self.assertIn('DESCRIPTION:Bring gloves\\; bags\\, too.\\nMeet at the gate.', body)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/events/calendar.ics').content, response.content)
+        with self.assertNumQueries(1):
+            not_modified = self.client.get('/events/calendar.ics', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_calendar_feed_follows_changes(self):
+        etag = self.client.get('/events/calendar.ics')['ETag']
+        event = Event.objects.get(title='Today')
+        event.title = 'Moved'
+        event.save()
+        response = self.client.get('/events/calendar.ics', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('SUMMARY:Moved', response.content.decode())
+        event.delete()
+        self.assertNotEqual(self.client.get('/events/calendar.ics')['ETag'], response['ETag'])
+
+    def test_long_lines_are_folded(self):
+        line = fold('DESCRIPTION:' + 'é' * 80)
+        self.assertTrue(all(len(part.encode()) <= 75 for part in line.split('\r\n')))
+        self.assertEqual(line.replace('\r\n ', ''), 'DESCRIPTION:' + 'é' * 80)
+
+
+class PostImageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+        cache.clear()
+
+    def upload(self, size=(2000, 1000)):
+        buffer = io.BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = 'CameraMaker'
+        Image.new('RGB', size, (30, 160, 60)).save(buffer, format='JPEG', exif=exif)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_add_post_generates_variants(self):
+        user = User.objects.create_user('author', password='pw')
+        self.client.force_login(user)
+        response = self.client.post('/add-post/', {
+            'title': 'With image', 'content': 'Text', 'image': self.upload(),
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(GreenPost.objects.get().image_variants, {})
+        run_pending()
+
+        post = GreenPost.objects.get()
+        self.assertEqual((post.image_width, post.image_height), (2000, 1000))
+        self.assertEqual(
+            {name: v['width'] for name, v in post.image_variants.items()},
+            {'thumb': 320, 'card': 640, 'full': 1600},
+        )
+        card = post.image_variants['card']
+        self.assertEqual(card['height'], 320)
+        with post.image.storage.open(card['jpeg']) as f:
+            self.assertNotIn(0x010F, Image.open(f).getexif())
+
+        self.client.logout()
+        response = self.client.get('/')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, 'card.jpg 640w')
+
+    def test_small_image_is_not_upscaled(self):
+        user = User.objects.create_user('author', password='pw')
+        post = GreenPost.objects.create(title='Small', content='Text', author=user, image=self.upload((300, 200)))
+        process_post_image(post)
+        self.assertEqual(list(post.image_variants), ['thumb'])
+        self.assertEqual(post.image_variants['thumb']['width'], 300)
+
+    def test_loading_a_post_does_not_open_its_image(self):
+        user = User.objects.create_user('author', password='pw')
+        GreenPost.objects.create(title='Lost image', content='Text', author=user, image='post_images/missing.jpg')
+        post = GreenPost.objects.get()
+        self.assertIsNone(post.image_width)
+        self.assertContains(self.client.get('/'), 'Lost image')
+        self.assertContains(self.client.get('/api/v1/posts/'), 'Lost image')
+        self.assertEqual(self.client.get(f'/post/{post.pk}/').status_code, 200)
+
+
+calls = []
+
+
+@task(name='tests.record', max_attempts=2)
+def record(value):
+    calls.append(value)
+    if value == 'boom':
+        raise ValueError(value)
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_job_runs_once(self):
+        enqueue(record, 'hello')
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(run_pending(), 0)
+        self.assertEqual(calls, ['hello'])
+        self.assertEqual(Job.objects.get().status, 'D')
+
+    def test_failed_job_is_retried_then_marked_failed(self):
+        job = enqueue(record, 'boom')
+        with self.assertLogs('greentech.queue', level='WARNING') as logs:
+            run_pending()
+        self.assertEqual(logs.output, [f'WARNING:greentech.queue:Job {job} failed (attempt 1), retrying'])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('Q', 1))
+        self.assertIn('ValueError', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=job.created_at)  # skip the backoff
+        with self.assertLogs('greentech.queue', level='ERROR') as logs:
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('F', 2))
+        self.assertEqual(logs.records[0].getMessage(), f'Job {job} failed permanently')
+        self.assertEqual(logs.records[0].exc_info[0], ValueError)
+
+    def test_delayed_job_waits(self):
+        enqueue(record, 'later', delay=datetime.timedelta(minutes=5))
+        self.assertEqual(run_pending(), 0)
+
+    def test_stale_job_is_reclaimed_once(self):
+        job = enqueue(record, 'stale')
+        Job.objects.filter(pk=job.pk).update(status='R', started_at=timezone.now() - datetime.timedelta(minutes=11))
+        self.assertEqual(claim_next().pk, job.pk)
+        # A second worker that saw the job as stale before the first claimed it
+        with mock.patch('django.db.models.query.QuerySet.values_list', return_value=[job.pk]):
+            self.assertIsNone(claim_next())
+
+    @override_settings(GREENTECH_TASKS_EAGER=True)
+    def test_eager_job_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue(record, 'eager')
+        self.assertEqual(calls, ['eager'])
+        self.assertEqual(Job.objects.get().status, 'D')
+        self.assertEqual(run_pending(), 0)
+
+    @override_settings(GREENTECH_TASKS_EAGER=True)
+    def test_eager_job_claimed_by_a_worker_is_not_run_again(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            enqueue(record, 'eager')
+        self.assertEqual(run_pending(), 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(calls, ['eager'])
+
+    def test_form_submission_queues_staff_notification(self):
+        self.client.post('/report-issue/', {'name': 'Sam', 'issue': 'Overflowing bins'})
+        job = Job.objects.get(task='greentech.tasks.notify_staff')
+        self.assertEqual(job.args[0], 'Issue reported by Sam')
+
+
+class VolunteerApplicationTests(TestCase):
+    def test_second_application_for_same_event_is_refused(self):
+        user = User.objects.create_user('volunteer', 'v@example.com', 'pw')
+        VolunteerRequest.objects.create(
+            user=user, name='V', email=user.email, phone_number='555',
+            area_of_interest='Trees', availability='Weekends', status='A',
+        )
+        event = Event.objects.create(
+            title='Cleanup', description='Beach', date=datetime.date(2030, 1, 1),
+            location='Beach', created_by=user,
+        )
+        self.client.force_login(user)
+        for _ in range(2):
+            response = self.client.post(f'/events/apply/?event={event.pk}', {'event': event.pk, 'motivation': 'Help'})
+            self.assertRedirects(response, '/events/', fetch_redirect_response=False)
+        self.assertEqual(VolunteerApplication.objects.filter(user=user, event=event).count(), 1)
+
+    def test_concurrent_duplicate_is_refused(self):
+        user = User.objects.create_user('volunteer', 'v@example.com', 'pw')
+        VolunteerRequest.objects.create(
+            user=user, name='V', email=user.email, phone_number='555',
+            area_of_interest='Trees', availability='Weekends', status='A',
+        )
+        event = Event.objects.create(
+            title='Cleanup', description='Beach', date=datetime.date(2030, 1, 1),
+            location='Beach', created_by=user,
+        )
+        VolunteerApplication.objects.create(event=event, user=user, name='V', email=user.email)
+        self.client.force_login(user)
+        # Both submissions passed the exists() check before either saved
+        with mock.patch.object(VolunteerApplication.objects, 'filter') as already_applied:
+            already_applied.return_value.exists.return_value = False
+            response = self.client.post(f'/events/apply/?event={event.pk}', {'event': event.pk, 'motivation': 'Help'})
+        self.assertRedirects(response, '/events/', fetch_redirect_response=False)
+        self.assertEqual(
+            [str(message) for message in response.wsgi_request._messages],
+            ['You have already applied for this event.'],
+        )
+        self.assertEqual(VolunteerApplication.objects.filter(user=user, event=event).count(), 1)
+
+    def test_event_list_shows_each_users_status(self):
+        organiser = User.objects.create_user('organiser', password='pw')
+        user = User.objects.create_user('volunteer', 'v@example.com', 'pw')
+        VolunteerRequest.objects.create(
+            user=user, name='V', email=user.email, phone_number='555',
+            area_of_interest='Trees', availability='Weekends', status='A',
+        )
+        events = [
+            Event.objects.create(
+                title=f'Event {i}', description='Beach', date=datetime.date(2030, 1, i + 1),
+                location='Beach', created_by=user if i == 3 else organiser,
+            )
+            for i in range(4)
+        ]
+        VolunteerApplication.objects.create(event=events[0], user=user, name='V', email=user.email, status='A')
+        VolunteerApplication.objects.create(event=events[1], user=user, name='V', email=user.email)
+        VolunteerApplication.objects.create(event=events[2], user=organiser, name='O', email='o@example.com')
+        self.client.force_login(user)
+        with self.assertNumQueries(5):
+            response = self.client.get('/events/')
+        self.assertContains(response, 'Accepted', count=1)
+        self.assertContains(response, 'Pending', count=1)
+        self.assertContains(response, f'?event={events[2].pk}')
+        self.assertContains(response, 'Your Event', count=1)
+
+
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+        cls.post = GreenPost.objects.create(title='Async post', content='Text', author=cls.author)
+        cls.event = Event.objects.create(
+            title='Cleanup', description='Beach', date=datetime.date(2030, 1, 1),
+            location='Beach', created_by=cls.author,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_public_pages_under_asgi(self):
+        for url in ('/', '/?q=async', f'/post/{self.post.pk}/', '/events/', f'/events/{self.event.pk}/'):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(f'/post/{self.post.pk}/')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    async def test_missing_post_is_404(self):
+        response = await self.async_client.get('/post/999999/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_feedback_submission(self):
+        await self.async_client.aforce_login(self.author)
+        response = await self.async_client.post(f'/post/{self.post.pk}/', {'feedback': 'Async feedback'})
+        self.assertRedirects(response, f'/post/{self.post.pk}/', fetch_redirect_response=False)
+        self.assertTrue(await Feedback.objects.filter(feedback='Async feedback').aexists())
+
+    def test_middleware_is_not_adapted_under_asgi(self):
+        # Django logs "... handler adapted for middleware ..." whenever it
+        # has to run part of the chain in a thread.
+        with self.assertNoLogs('django.request', 'DEBUG'):
+            ASGIHandler()
+
+    async def test_query_stats_under_asgi(self):
+        response = await self.async_client.get(f'/post/{self.post.pk}/')
+        self.assertGreater(response.asgi_request.query_stats.count, 0)
+
+    def test_staff_redirected_from_home(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        self.assertRedirects(self.client.get('/'), '/dashboard/', fetch_redirect_response=False)
+
+
+CACHE_DOWN_WARNING = 'Rate limit cache unavailable; using in-process buckets.'
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bucket_refills(self):
+        for second in range(3):
+            self.assertEqual(take('test', 'ip', '3/m', now=100 + second), 0)
+        self.assertAlmostEqual(take('test', 'ip', '3/m', now=103), 17)
+        self.assertEqual(take('other', 'ip', '3/m', now=103), 0)
+        self.assertEqual(take('test', 'ip', '3/m', now=123), 0)
+
+    @override_settings(GREENTECH_RATELIMITS={'report_issue': '2/m'})
+    def test_throttled_before_the_database(self):
+        for _ in range(2):
+            response = self.client.post('/report-issue/', {'name': 'A', 'issue': 'Litter'})
+            self.assertEqual(response.status_code, 302)
+        with self.assertNumQueries(0):
+            response = self.client.post('/report-issue/', {'name': 'A', 'issue': 'Litter'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+        self.assertEqual(ReportIssue.objects.count(), 2)
+        # Reading the form is never throttled; other clients have their own bucket.
+        self.assertEqual(self.client.get('/report-issue/').status_code, 200)
+        response = self.client.post('/report-issue/', {'name': 'B', 'issue': 'Litter'}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(GREENTECH_RATELIMITS={'login': '1/h'})
+    def test_login_throttled(self):
+        User.objects.create_user('member', password='pw')
+        for url in ('/login/', '/accounts/login/'):
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertEqual(self.client.post(url, {'username': 'member', 'password': 'pw'}).status_code, 302)
+                self.assertEqual(self.client.post(url, {'username': 'member', 'password': 'pw'}).status_code, 429)
+
+    @override_settings(GREENTECH_RATELIMITS={'feedback': '1/m'})
+    async def test_async_post_feedback_throttled(self):
+        author = await User.objects.acreate(username='author')
+        post = await GreenPost.objects.acreate(title='Post', content='Text', author=author)
+        await self.async_client.aforce_login(author)
+        await self.async_client.post(f'/post/{post.pk}/', {'feedback': 'One'})
+        response = await self.async_client.post(f'/post/{post.pk}/', {'feedback': 'Two'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(await Feedback.objects.acount(), 1)
+
+    @override_settings(GREENTECH_RATELIMITS={'feedback': '1/m'})
+    async def test_async_view_uses_async_cache(self):
+        author = await User.objects.acreate(username='author')
+        post = await GreenPost.objects.acreate(title='Post', content='Text', author=author)
+        await self.async_client.aforce_login(author)
+        # The blocking take() would stall the event loop on a remote cache.
+        with mock.patch('greentech.ratelimit.take', side_effect=AssertionError):
+            await self.async_client.post(f'/post/{post.pk}/', {'feedback': 'One'})
+            response = await self.async_client.post(f'/post/{post.pk}/', {'feedback': 'Two'})
+        self.assertEqual(response.status_code, 429)
+
+    async def test_async_falls_back_to_memory_when_cache_fails(self):
+        with mock.patch('greentech.ratelimit.cache.aget', side_effect=ConnectionError), \
+                mock.patch('greentech.ratelimit.cache.aset', side_effect=ConnectionError), \
+                self.assertLogs('greentech.ratelimit', level='WARNING') as logs:
+            self.assertEqual(await atake('test', 'adown', '1/m', now=100), 0)
+            self.assertGreater(await atake('test', 'adown', '1/m', now=101), 0)
+        self.assertEqual([record.getMessage() for record in logs.records], [CACHE_DOWN_WARNING] * 2)
+
+    def test_falls_back_to_memory_when_cache_fails(self):
+        with mock.patch('greentech.ratelimit.cache.get', side_effect=ConnectionError), \
+                mock.patch('greentech.ratelimit.cache.set', side_effect=ConnectionError), \
+                self.assertLogs('greentech.ratelimit', level='WARNING') as logs:
+            self.assertEqual(take('test', 'down', '1/m', now=100), 0)
+            self.assertGreater(take('test', 'down', '1/m', now=101), 0)
+        self.assertEqual([record.getMessage() for record in logs.records], [CACHE_DOWN_WARNING] * 2)
+
+    def test_client_ip_behind_proxies(self):
+        request = self.client.get('/about/', REMOTE_ADDR='10.0.0.1',
+                                  HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 3.3.3.3').wsgi_request
+        self.assertEqual(client_ip(request), '10.0.0.1')
+        with self.settings(GREENTECH_TRUSTED_PROXIES=2):
+            self.assertEqual(client_ip(request), '2.2.2.2')
+        with self.settings(GREENTECH_TRUSTED_PROXIES=5):
+            self.assertEqual(client_ip(request), '10.0.0.1')
+
+
+class RequestLogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def logged(self, path, level='INFO'):
+        with self.assertLogs('greentech.requests', level) as logs:
+            response = self.client.get(path)
+        self.assertEqual(len(logs.records), 1)
+        return response, json.loads(logs.records[0].getMessage())
+
+    @override_settings(GREENTECH_REQUEST_LOG_SAMPLE=1, GREENTECH_SLOW_REQUEST_MS=0)
+    def test_one_json_line_per_request(self):
+        response, entry = self.logged('/about/')
+        self.assertEqual(entry['route'], 'about')
+        self.assertEqual(entry['view'], 'greentech.views.AboutView')
+        self.assertEqual((entry['status'], entry['queries'], entry['weight']), (200, 0, 1))
+        self.assertEqual(entry['bytes'], len(response.content))
+        self.assertGreater(entry['template_ms'], 0)
+        self.assertNotIn('slow', entry)
+        # A page cache hit renders no template.
+        _, entry = self.logged('/about/')
+        self.assertEqual((entry['cache'], entry['template_ms']), ('hit', 0))
+
+    @override_settings(GREENTECH_REQUEST_LOG_SAMPLE=0.25, GREENTECH_SLOW_REQUEST_MS=0)
+    def test_sampling(self):
+        with mock.patch('greentech.middleware.random.random', return_value=0.5):
+            with self.assertNoLogs('greentech.requests', 'INFO'):
+                self.client.get('/about/')
+        with mock.patch('greentech.middleware.random.random', return_value=0.1):
+            _, entry = self.logged('/about/')
+        self.assertEqual(entry['weight'], 4)
+
+    @override_settings(GREENTECH_REQUEST_LOG_SAMPLE=0, GREENTECH_SLOW_REQUEST_MS=20)
+    def test_slow_request_has_sql_and_profile(self):
+        get = AboutView.get
+
+        def slow_get(view, request, *args, **kwargs):
+            User.objects.count()
+            time.sleep(0.1)
+            return get(view, request, *args, **kwargs)
+
+        with mock.patch.object(AboutView, 'get', slow_get):
+            _, entry = self.logged('/about/', 'WARNING')
+        self.assertTrue(entry['slow'])
+        self.assertEqual(entry['weight'], 1)
+        self.assertEqual(len(entry['sql']), entry['queries'])
+        self.assertIn('auth_user', entry['sql'][-1]['sql'])
+        self.assertTrue(any('greentech.tests:slow_get' in row['stack'] for row in entry['profile']))
+
+    @override_settings(GREENTECH_REQUEST_LOG_SAMPLE=0, GREENTECH_SLOW_REQUEST_MS=20)
+    async def test_slow_request_profile_under_asgi(self):
+        get = AboutView.get
+
+        def slow_get(view, request, *args, **kwargs):
+            time.sleep(0.1)
+            return get(view, request, *args, **kwargs)
+
+        with mock.patch.object(AboutView, 'get', slow_get):
+            with self.assertLogs('greentech.requests', 'WARNING') as logs:
+                await self.async_client.get('/about/')
+        entry = json.loads(logs.records[0].getMessage())
+        # The sync view runs in a thread; the request's task waits on it.
+        self.assertTrue(any('_get_response_async' in row['stack'] for row in entry['profile']))
+
+    def test_sampler_sleeps_while_no_request_is_slow(self):
+        sampler = StackSampler(threshold=0.02, interval=0.005)
+        key = sampler.start()
+        time.sleep(0.1)
+        self.assertTrue(sampler.stop(key))
+        time.sleep(0.05)
+        # Blocked on the condition, not polling
+        frame = sys._current_frames()[sampler._thread.ident]
+        self.assertEqual((frame.f_code.co_name, frame.f_back.f_code.co_name), ('wait', '_wait_for_due'))
+
+        key = sampler.start()
+        time.sleep(0.005)
+        frame = sys._current_frames()[sampler._thread.ident]
+        self.assertEqual(frame.f_back.f_code.co_name, '_wait_for_due')
+        self.assertEqual(sampler.stop(key), [])
+
+    def test_report(self):
+        entries = [
+            {'route': 'home', 'total_ms': ms, 'sql_ms': 1, 'queries': 2, 'status': 200, 'weight': 10}
+            for ms in (10, 20, 30)
+        ] + [{'route': 'home', 'total_ms': 900, 'status': 500, 'slow': True, 'weight': 1}]
+        [row] = aggregate(entries)
+        self.assertEqual((row['requests'], row['logged'], row['slow'], row['errors']), (31, 4, 1, 1))
+        # The always-logged slow request counts once, not as ten.
+        self.assertEqual((row['p50_ms'], row['p95_ms'], row['p99_ms']), (20, 30, 900))
+        self.assertEqual(row['queries'], 2)
+
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as f:
+            f.write('not json\n' + ''.join(json.dumps(entry) + '\n' for entry in entries))
+        self.addCleanup(os.remove, f.name)
+        out = io.StringIO()
+        call_command('request_log_report', f.name, stdout=out)
+        self.assertRegex(out.getvalue(), r'home +31 +1 +1 +20 ')
+
+
+class BulkModerationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        cls.requests = [
+            VolunteerRequest.objects.create(
+                name=f'V{i}', email='v@example.com', phone_number='555',
+                area_of_interest='Trees', availability='Weekends',
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_bulk_accept_updates_and_audits(self):
+        self.requests[0].status = 'A'
+        self.requests[0].save()
+        ids = [r.pk for r in self.requests] + [999999]
+        response = self.client.post('/volunteer-requests/moderate/', {'action': 'accept', 'ids': ids})
+        self.assertRedirects(response, '/volunteer-requests/', fetch_redirect_response=False)
+        self.assertEqual(VolunteerRequest.objects.filter(status='A').count(), 5)
+        logs = ModerationLog.objects.filter(kind='R')
+        self.assertEqual(sorted(logs.values_list('object_id', flat=True)), ids[1:5])
+        self.assertTrue(all(log.old_status == 'P' and log.new_status == 'A' and log.moderator == self.staff for log in logs))
+        message = str(list(response.wsgi_request._messages)[0])
+        self.assertEqual(message, "Accepted 4 requests. 1 already had that status. 1 no longer exist.")
+
+    def test_json_api(self):
+        response = self.client.post(
+            '/volunteer-requests/moderate/',
+            {'action': 'deny', 'ids': [r.pk for r in self.requests[:2]]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json(), {'action': 'deny', 'changed': 2, 'unchanged': 0, 'missing': 0})
+        response = self.client.post(
+            '/volunteer-requests/moderate/', {'action': 'maybe', 'ids': []},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'action', 'ids'})
+
+    def test_members_cannot_moderate(self):
+        member = User.objects.create_user('member', password='pw')
+        self.client.force_login(member)
+        self.client.post('/volunteer-requests/moderate/', {'action': 'accept', 'ids': [self.requests[0].pk]})
+        self.assertFalse(VolunteerRequest.objects.filter(status='A').exists())
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        ContactMessage.objects.create(name='Ann', email='ann@example.com', message='Hello, "world"')
+        ContactMessage.objects.create(name='=HYPERLINK("x")', email='bob@example.com', message='Hi')
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def test_csv_is_streamed(self):
+        response = self.client.get('/exports/contacts.csv')
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="contacts-', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ['id', 'name', 'email', 'message', 'created_at'])
+        self.assertEqual(rows[1][1:4], ['Ann', 'ann@example.com', 'Hello, "world"'])
+        self.assertEqual(rows[2][1], '\'=HYPERLINK("x")')
+
+    def test_jsonl(self):
+        response = self.client.get('/exports/contacts.jsonl')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ['Ann', '=HYPERLINK("x")'])
+
+    def test_export_uses_bounded_queries(self):
+        for i in range(50):
+            Feedback.objects.create(user=self.staff, feedback=f'Feedback {i}')
+        response = self.client.get('/exports/feedback.csv')
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content)
+        self.assertEqual(content.count(b'\n'), 51)
+
+    async def test_streamed_asynchronously_under_asgi(self):
+        await Feedback.objects.abulk_create([  # more than one chunk
+            Feedback(user=self.staff, feedback=f'Feedback {i}') for i in range(3000)
+        ])
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get('/exports/feedback.jsonl')
+        self.assertTrue(response.is_async)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(b''.join(chunks).count(b'\n'), 3000)
+
+    def test_unknown_export_is_404(self):
+        self.assertEqual(self.client.get('/exports/passwords.csv').status_code, 404)
+        self.assertEqual(self.client.get('/exports/contacts.xml').status_code, 404)
+
+    def test_members_cannot_export(self):
+        self.client.force_login(User.objects.create_user('member', password='pw'))
+        self.assertEqual(self.client.get('/exports/contacts.csv').status_code, 302)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('export_data', 'contacts', '--format', 'jsonl', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pw')
+
+    def test_posts_from_csv(self):
+        rows = read_rows(io.StringIO(
+            'title,content,author\n'
+            'Solar roofs,Panels on every school,author\n'
+            ',No title,author\n'
+            'Compost,Kitchen scraps,nobody\n'
+            'Rain gardens,Soak up storm water,author\n'
+        ), 'csv')
+        result = import_rows('posts', rows, batch_size=2)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([number for number, _ in result.errors], [2, 3])
+        self.assertIn("unknown user 'nobody'", result.errors[1][1])
+        self.assertEqual(get_counts()['posts'], 2)
+        self.assertEqual([p.title for p in search_posts('rain')], ['Rain gardens'])
+
+    def test_users_from_jsonl(self):
+        hashed = make_password('secret')
+        rows = read_rows(io.StringIO(
+            json.dumps({'username': 'ann', 'email': 'ann@example.com', 'password': hashed}) + '\n'
+            + json.dumps({'username': 'author'}) + '\n'
+            + json.dumps({'username': 'ann'}) + '\n'
+            + json.dumps({'username': 'bob'}) + '\n'
+        ), 'jsonl')
+        result = import_rows('users', rows)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([number for number, _ in result.errors], [2, 3])
+        self.assertTrue(User.objects.get(username='ann').check_password('secret'))
+        self.assertFalse(User.objects.get(username='bob').has_usable_password())
+
+    def test_unreadable_jsonl_line_is_skipped(self):
+        rows = read_rows(io.StringIO(
+            json.dumps({'title': 'Solar roofs', 'content': 'Panels', 'author': 'author'}) + '\n'
+            + '{"title": "Broken\n'
+            + '["not", "an", "object"]\n'
+            + json.dumps({'title': 'Rain gardens', 'content': 'Storm water', 'author': 'author'}) + '\n'
+        ), 'jsonl')
+        result = import_rows('posts', rows, batch_size=1)
+        self.assertEqual(result.created, 2)
+        self.assertEqual([number for number, _ in result.errors], [2, 3])
+        self.assertIn('Line 2 is not valid JSON', result.errors[0][1])
+        self.assertEqual(get_counts()['posts'], 2)
+
+    def test_counters_refreshed_when_a_batch_fails(self):
+        rows = [{'title': f'Post {i}', 'content': 'Text', 'author': 'author'} for i in range(3)]
+        create = GreenPost.objects.bulk_create
+        batches = []
+
+        def bulk_create(objs):
+            batches.append(objs)
+            if len(batches) == 2:
+                raise RuntimeError('disk full')
+            return create(objs)
+
+        with mock.patch.object(GreenPost.objects, 'bulk_create', bulk_create):
+            with self.assertRaises(RuntimeError):
+                import_rows('posts', rows, batch_size=1)
+        self.assertEqual(get_counts()['posts'], 1)
+
+    def test_command(self):
+        path = os.path.join(tempfile.mkdtemp(), 'events.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write('title,description,date,location,created_by\n')
+            f.write('Cleanup,Beach,2030-01-01,Beach,author\n')
+            f.write('Planting,Park,not a date,Park,author\n')
+        out, err = io.StringIO(), io.StringIO()
+        call_command('import_data', 'events', path, stdout=out, stderr=err)
+        self.assertIn('Imported 1 events', out.getvalue())
+        self.assertIn('row 2: date:', err.getvalue())
+        self.assertEqual(Event.objects.get().created_by, self.author)
+
+    def test_command_rejects_empty_batches(self):
+        with self.assertRaisesMessage(CommandError, '--batch-size must be at least 1.'):
+            call_command('import_data', 'events', '-', batch_size=0)
+
+
+class BenchmarkTests(TestCase):
+    def test_every_route_is_benchmarked_or_skipped(self):
+        generate({name: 3 for name in DEFAULT_SIZES})
+        benchmarked = {name for name, _, _ in targets()}
+        self.assertEqual(url_names(urls) - benchmarked - set(SKIPPED), set())
+        self.assertEqual(benchmarked & set(SKIPPED), set())
+
+    def test_client_run(self):
+        generate({name: 3 for name in DEFAULT_SIZES})
+        report = run_benchmark(ClientRunner(), requests=2, only={'home', 'dashboard'})
+        self.assertEqual(
+            [(r['route'], r['persona'], r['status']) for r in report['routes']],
+            [('home', 'anonymous', 200), ('home', 'anonymous', 200),
+             ('home', 'volunteer', 200), ('dashboard', 'staff', 200)],
+        )
+        self.assertEqual(report['routes'][-1]['requests'], 2)
+        self.assertEqual(report['rows']['posts'], 3)
+        json.dumps(report)
+
+    def test_bench_queries_on_an_empty_database(self):
+        out = io.StringIO()
+        call_command('bench_queries', runs=1, stdout=out)
+        self.assertIn('home first page', out.getvalue())
+        self.assertNotIn('home deep page', out.getvalue())
+
+class StaticBuildTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'greentech.staticfiles.CompressedManifestStaticFilesStorage'},
+        }
+        settings_override = override_settings(STATIC_ROOT=cls.static_root, STORAGES=storages)
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.static_root, 'staticfiles.json')) as f:
+            cls.manifest = json.load(f)['paths']
+
+    def test_collectstatic_hashes_minifies_and_compresses(self):
+        hashed = self.manifest['greentech/style.css']
+        self.assertRegex(hashed, r'^greentech/style\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.static_root, hashed)) as f:
+            css = f.read()
+        self.assertNotIn('/*', css)
+        self.assertNotIn('\n', css)
+        self.assertTrue(os.path.exists(os.path.join(self.static_root, hashed + '.gz')))
+
+    def test_hashed_files_are_served_immutable_and_compressed(self):
+        url = '/static/' + self.manifest['vendor/bootstrap-5.3.0/bootstrap.min.css']
+        client = Client(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = client.get(url)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn(b'Bootstrap', gzip.decompress(b''.join(response.streaming_content)))
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    async def test_served_without_a_thread_under_asgi(self):
+        url = '/static/' + self.manifest['greentech/style.css']
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body), int(response['Content-Length']))
+
+    def test_unhashed_and_missing_files(self):
+        response = Client().get('/static/greentech/style.css')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(Client().get('/static/../manage.py').status_code, 404)
+
+    def test_minify_css_keeps_descendant_pseudo_selectors(self):
+        self.assertEqual(minify_css('.nav :hover {\n  color: red;\n}'), '.nav :hover{color:red}')
@@ -3,14 +3,17 @@ from django.contrib.auth.views import LoginView, LogoutView
 from .views import (
     HomeView, AddPostView, PostDetailView,
     AdminPostListView, DeletePostView,
-    SignUpView, ContactView, ContactMessagesView,
+    SignUpView, ContactView, ContactMessagesView, ExportView,
     AboutView, FeedbackView, FeedbackListView, DeleteFeedbackView,
     VolunteerRequestView, VolunteerRequestsView,
     AcceptVolunteerView, DenyVolunteerView,
     ReportIssueView, DashboardView, UserListView, DeleteUserView,
-    EventListView, EventDetailView, AddEventView, VolunteerApplicationView,
-    AcceptEventVolunteerView, DenyEventVolunteerView
+    EventListView, EventCalendarView, AdminEventListView, EventDetailView, AddEventView, VolunteerApplicationView,
+    AcceptEventVolunteerView, DenyEventVolunteerView,
+    BulkModerateVolunteersView, BulkModerateEventVolunteersView,
+    APIListView, APIDetailView
 )
+from .ratelimit import ratelimit
 
 urlpatterns = [
     # Home & Posts
@@ -22,13 +25,16 @@ urlpatterns = [
 
     # Authentication
     path('signup/', SignUpView.as_view(), name='signup'),
-    path('login/', LoginView.as_view(template_name='greentech/login.html'), name='login'),
+    path('login/', ratelimit('login')(LoginView.as_view(template_name='greentech/login.html')), name='login'),
     path('logout/', LogoutView.as_view(next_page='home'), name='logout'),
 
     # Contact
     path('contact/', ContactView.as_view(), name='contact'),
     path('contact-messages/', ContactMessagesView.as_view(), name='contact_messages'),
 
+    # Exports
+    path('exports/<slug:name>.<slug:fmt>', ExportView.as_view(), name='export'),
+
     # About
     path('about/', AboutView.as_view(), name='about'),
 
@@ -40,6 +46,7 @@ urlpatterns = [
     # Volunteers
     path('volunteer/', VolunteerRequestView.as_view(), name='volunteer'),
     path('volunteer-requests/', VolunteerRequestsView.as_view(), name='volunteer_requests'),
+    path('volunteer-requests/moderate/', BulkModerateVolunteersView.as_view(), name='bulk_moderate_volunteers'),
     path('volunteer-requests/<int:pk>/accept/', AcceptVolunteerView.as_view(), name='accept_volunteer'),
     path('volunteer-requests/<int:pk>/deny/', DenyVolunteerView.as_view(), name='deny_volunteer'),
 
@@ -54,11 +61,20 @@ urlpatterns = [
 
     # Event
     path('events/', EventListView.as_view(), name='event_list'),
+    path('events/calendar.ics', EventCalendarView.as_view(), name='event_calendar'),
     path('events/add/', AddEventView.as_view(), name='add_event'),
     path('events/<int:pk>/', EventDetailView.as_view(), name='event_detail'),
     path('events/apply/', VolunteerApplicationView.as_view(), name='apply_volunteer'),
-    path('admin-events/', EventListView.as_view(template_name='greentech/admin_event_list.html'),
-         name='admin_event_list'),
+    path('admin-events/', AdminEventListView.as_view(), name='admin_event_list'),
+    path('admin-events/moderate/', BulkModerateEventVolunteersView.as_view(), name='bulk_moderate_event_volunteers'),
     path('admin-events/<int:pk>/accept/', AcceptEventVolunteerView.as_view(), name='accept_event_volunteer'),
     path('admin-events/<int:pk>/deny/', DenyEventVolunteerView.as_view(), name='deny_event_volunteer'),
+
+    # JSON API
+    path('api/v1/posts/', APIListView.as_view(resource_name='posts'), name='api_post_list'),
+    path('api/v1/posts/<int:pk>/', APIDetailView.as_view(resource_name='posts'), name='api_post_detail'),
+    path('api/v1/events/', APIListView.as_view(resource_name='events'), name='api_event_list'),
+    path('api/v1/events/<int:pk>/', APIDetailView.as_view(resource_name='events'), name='api_event_detail'),
+    path('api/v1/feedback/', APIListView.as_view(resource_name='feedback'), name='api_feedback_list'),
+    path('api/v1/feedback/<int:pk>/', APIDetailView.as_view(resource_name='feedback'), name='api_feedback_detail'),
 ]
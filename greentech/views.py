@@ -1,59 +1,112 @@
-from django.shortcuts import redirect, get_object_or_404
+import datetime
+import json
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import redirect, get_object_or_404, aget_object_or_404
 from django.contrib.auth import login
 from django.contrib.auth.models import User
 from django.contrib.auth.views import LoginView, LogoutView
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.template.defaultfilters import pluralize
 from django.utils.decorators import method_decorator
 from django.views.generic import (
     ListView, CreateView, DetailView, TemplateView, DeleteView, View
 )
 from django.urls import reverse_lazy
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Min, OuterRef, Prefetch, Q, Subquery
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
 
 from .models import (
     GreenPost, ContactMessage, Feedback,
     VolunteerRequest, Suggestion, ReportIssue,
     Event, VolunteerApplication
 )
+from .api import RESOURCES, error_response, json_response, parse_limit
+from .caching import CachedPageMixin, ConditionalGetMixin
+from .counters import get_counts
+from .exports import EXPORTS, FORMATS, aiter_chunks, iter_export
+from . import ical
+from .middleware import aget_user
+from .moderation import moderate
+from .pagination import KeysetPaginationMixin, akeyset_paginate, keyset_paginate, offset_paginate
+from .queue import enqueue
+from .ratelimit import RateLimitMixin
+from .search import search_posts
+from .tasks import notify_staff, process_post_image_task
+from .visits import arecord_visit
 from .forms import (
     GreenPostForm, ContactForm, SignUpForm, FeedbackForm,
     VolunteerRequestForm, ReportIssueForm,
-    EventForm, VolunteerApplicationForm
+    EventForm, VolunteerApplicationForm, BulkModerationForm
 )
 
 
 # ---------------------------
 # Home & Posts
 # ---------------------------
-class HomeView(ListView):
+class HomeView(CachedPageMixin, KeysetPaginationMixin, ListView):
     model = GreenPost
     template_name = 'greentech/home.html'
     context_object_name = 'posts'
     ordering = ['-created_at']
+    paginate_by = 12
+    cache_tags = ['posts']
+    # ?sort= value -> ordering; "discussed" uses greentech_post_discussed_idx
+    sorts = {
+        'new': ['-created_at'],
+        'discussed': ['-feedback_count', '-pk'],
+    }
+
+    def get_ordering(self):
+        sort = self.request.GET.get('sort', 'new')
+        if sort not in self.sorts:
+            raise Http404("Unknown sort order.")
+        return self.sorts[sort]
 
-    def dispatch(self, request, *args, **kwargs):
-        if request.user.is_authenticated and request.user.is_staff:
+    def get_queryset(self):
+        return super().get_queryset().select_related('author')
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Counted before the page cache so cached views count too.
+        if request.method == 'GET':
+            self.visits = await arecord_visit('home')
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        user = await aget_user(request)
+        if user.is_authenticated and user.is_staff:
             return redirect('dashboard')
-        return super().dispatch(request, *args, **kwargs)
 
-    def get_queryset(self):
-        q = self.request.GET.get('q', '')
-        qs = GreenPost.objects.all()
+        q = request.GET.get('q', '').strip()
         if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(content__icontains=q))
-        return qs.order_by('-created_at')
-
-    def get_context_data(self, **kwargs):
-        ctx = super().get_context_data(**kwargs)
-        visits = self.request.session.get('visits', 0) + 1
-        self.request.session['visits'] = visits
-        ctx.update({
-            'visits': visits,
-            'query': self.request.GET.get('q', ''),
+            # Ranked results from the full-text index, best match first
+            page = await sync_to_async(offset_paginate)(
+                lambda limit, offset: search_posts(q, limit=limit, offset=offset),
+                self.paginate_by,
+                request.GET.get(self.cursor_kwarg),
+            )
+        else:
+            _, page, _, _ = await self.apaginate_queryset(self.get_queryset(), self.paginate_by)
+
+        self.object_list = page.object_list
+        return self.render_to_response({
+            'view': self,
+            'paginator': None,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'posts': page.object_list,
+            'visits': getattr(self, 'visits', None),
+            'query': request.GET.get('q', ''),
+            'sort': request.GET.get('sort', 'new'),
         })
-        return ctx
 
 
 class AddPostView(LoginRequiredMixin, CreateView):
@@ -64,34 +117,71 @@ class AddPostView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if self.object.image:
+            enqueue(process_post_image_task, self.object.pk)
+        return response
 
 
-class PostDetailView(DetailView):
+class PostDetailView(RateLimitMixin, CachedPageMixin, ConditionalGetMixin, DetailView):
+    ratelimit_scope = 'feedback'
     model = GreenPost
     template_name = 'greentech/post_detail.html'
     context_object_name = 'post'
+    feedback_paginate_by = 20
+
+    def get_cache_tags(self):
+        return [f"post:{self.kwargs['pk']}"]
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('author')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        # Feedback form and list for this post
         context['feedback_form'] = FeedbackForm()
-        context['feedbacks'] = Feedback.objects.filter(post=self.object).order_by('-created_at')
         return context
 
-    def post(self, request, *args, **kwargs):
+    async def aget_validators(self):
+        # Loads the post for get() in the same query.
+        self.object = await self.get_queryset().filter(pk=self.kwargs['pk']).afirst()
+        if self.object is None:
+            return None
+        post = self.object
+        version = ':'.join([
+            post.updated_at.isoformat(), str(post.last_feedback_at), str(post.feedback_count),
+            ','.join(sorted(post.image_variants)),
+        ])
+        return version, max(filter(None, [post.updated_at, post.last_feedback_at]))
+
+    async def get(self, request, *args, **kwargs):
+        if getattr(self, 'object', None) is None:
+            self.object = await aget_object_or_404(self.get_queryset(), pk=kwargs['pk'])
+        feedbacks = (
+            Feedback.objects.filter(post=self.object)
+            .select_related('user')
+            .only('feedback', 'created_at', 'post_id', 'user__username')
+        )
+        page = await akeyset_paginate(
+            feedbacks, ['-created_at', '-pk'], self.feedback_paginate_by,
+            request.GET.get('cursor'),
+        )
+        context = self.get_context_data(object=self.object, feedbacks=page.object_list, feedback_page=page)
+        return self.render_to_response(context)
+
+    async def post(self, request, *args, **kwargs):
         """Handles feedback form submissions."""
-        self.object = self.get_object()
-        if not request.user.is_authenticated:
+        self.object = await aget_object_or_404(GreenPost, pk=kwargs['pk'])
+        user = await aget_user(request)
+        if not user.is_authenticated:
             messages.error(request, "You need to be logged in to submit feedback.")
             return redirect('login')
 
         form = FeedbackForm(request.POST)
         if form.is_valid():
             feedback = form.save(commit=False)
-            feedback.user = request.user
+            feedback.user = user
             feedback.post = self.object
-            feedback.save()
+            await feedback.asave()
             messages.success(request, "Thank you for your feedback!")
         else:
             messages.error(request, "There was a problem with your feedback.")
@@ -100,12 +190,15 @@ class PostDetailView(DetailView):
 
 
 @method_decorator(staff_member_required, name='dispatch')
-class AdminPostListView(ListView):
+class AdminPostListView(KeysetPaginationMixin, ListView):
     model = GreenPost
     template_name = 'greentech/admin_post_list.html'
     context_object_name = 'posts'
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('author')
+
 
 @method_decorator(staff_member_required, name='dispatch')
 class DeletePostView(DeleteView):
@@ -122,7 +215,8 @@ class DeletePostView(DeleteView):
 # ---------------------------
 # Authentication
 # ---------------------------
-class SignUpView(CreateView):
+class SignUpView(RateLimitMixin, CreateView):
+    ratelimit_scope = 'signup'
     form_class = SignUpForm
     template_name = 'greentech/signup.html'
     success_url = reverse_lazy('home')
@@ -136,36 +230,61 @@ class SignUpView(CreateView):
 # ---------------------------
 # Contact
 # ---------------------------
-class ContactView(LoginRequiredMixin, CreateView):
+class ContactView(RateLimitMixin, LoginRequiredMixin, CreateView):
+    ratelimit_scope = 'contact'
+    ratelimit_key = 'user'
     model = ContactMessage
     form_class = ContactForm
     template_name = 'greentech/contact.html'
     success_url = reverse_lazy('contact')
 
     def form_valid(self, form):
+        response = super().form_valid(form)
+        msg = self.object
+        enqueue(notify_staff, f"New message from {msg.name}", f"{msg.name} <{msg.email}> wrote:\n\n{msg.message}")
         messages.success(self.request, "Message sent successfully.")
-        return super().form_valid(form)
+        return response
 
 
 @method_decorator(staff_member_required, name='dispatch')
-class ContactMessagesView(ListView):
+class ContactMessagesView(KeysetPaginationMixin, ListView):
     model = ContactMessage
     template_name = 'greentech/contact_messages.html'
     context_object_name = 'contact_messages'
     ordering = ['-created_at']
 
 
+@method_decorator(staff_member_required, name='dispatch')
+class ExportView(View):
+    """Download a whole staff table as CSV or JSON Lines, streamed row by row."""
+
+    def get(self, request, name, fmt):
+        if name not in EXPORTS or fmt not in FORMATS:
+            raise Http404("No such export.")
+        chunks = iter_export(name, fmt)
+        if isinstance(request, ASGIRequest):
+            # Under ASGI Django reads a sync iterator into a list first
+            # (with a warning), holding the whole export in memory.
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=FORMATS[fmt])
+        filename = f"{name}-{timezone.now():%Y%m%d-%H%M}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 # ---------------------------
 # About (Static Page)
 # ---------------------------
-class AboutView(TemplateView):
+class AboutView(CachedPageMixin, TemplateView):
     template_name = 'greentech/about.html'
 
 
 # ---------------------------
 # Feedback
 # ---------------------------
-class FeedbackView(LoginRequiredMixin, CreateView):
+class FeedbackView(RateLimitMixin, LoginRequiredMixin, CreateView):
+    ratelimit_scope = 'feedback'
+    ratelimit_key = 'user'
     model = Feedback
     form_class = FeedbackForm
     template_name = 'greentech/feedback.html'
@@ -175,6 +294,7 @@ class FeedbackView(LoginRequiredMixin, CreateView):
         fb = form.save(commit=False)
         fb.user = self.request.user
         fb.save()
+        enqueue(notify_staff, f"New feedback from {fb.user.username}", fb.feedback)
         messages.success(self.request, "Feedback submitted.")
         return redirect(self.success_url)
 
@@ -199,11 +319,17 @@ class VolunteerRequestView(LoginRequiredMixin, CreateView):
         form.instance.user = self.request.user
         form.instance.name = self.request.user.get_full_name() or self.request.user.username
         form.instance.email = self.request.user.email
+        response = super().form_valid(form)
+        vr = self.object
+        enqueue(
+            notify_staff, f"New community request from {vr.name}",
+            f"{vr.name} <{vr.email}> wants to help with {vr.area_of_interest} ({vr.availability}).",
+        )
         messages.success(self.request, "Your volunteer request has been submitted successfully.")
-        return super().form_valid(form)
+        return response
 
 @method_decorator(staff_member_required, name='dispatch')
-class VolunteerRequestsView(ListView):
+class VolunteerRequestsView(KeysetPaginationMixin, ListView):
     model = VolunteerRequest
     template_name = 'greentech/volunteer_requests.html'
     context_object_name = 'requests'
@@ -214,8 +340,7 @@ class VolunteerRequestsView(ListView):
 class AcceptVolunteerView(View):
     def post(self, request, pk):
         vr = get_object_or_404(VolunteerRequest, pk=pk)
-        vr.status = 'A'
-        vr.save()
+        moderate(VolunteerRequest, [vr.pk], 'A', request.user)
         messages.success(request, f"Accepted volunteer request from {vr.name}.")
         return redirect('volunteer_requests')
 
@@ -227,8 +352,7 @@ class AcceptVolunteerView(View):
 class DenyVolunteerView(View):
     def post(self, request, pk):
         vr = get_object_or_404(VolunteerRequest, pk=pk)
-        vr.status = 'D'
-        vr.save()
+        moderate(VolunteerRequest, [vr.pk], 'D', request.user)
         messages.warning(request, f"Denied volunteer request from {vr.name}.")
         return redirect('volunteer_requests')
 
@@ -236,6 +360,61 @@ class DenyVolunteerView(View):
         return redirect('volunteer_requests')
 
 
+class BulkModerationView(View):
+    """
+    Accept or deny many rows in one POST.
+
+    The staff list pages post ``action`` and repeated ``ids`` fields and get
+    redirected back with a summary message. API clients can post a JSON body
+    such as ``{"action": "deny", "ids": [3, 4]}`` and get the counts as JSON.
+    """
+    model = None
+    noun = None
+    success_url = None
+
+    def post(self, request):
+        wants_json = request.content_type == 'application/json'
+        if wants_json:
+            try:
+                data = json.loads(request.body)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                return JsonResponse({'errors': {'__all__': ["Invalid JSON body."]}}, status=400)
+        else:
+            data = request.POST
+
+        form = BulkModerationForm(data)
+        if not form.is_valid():
+            if wants_json:
+                return JsonResponse({'errors': form.errors}, status=400)
+            messages.error(request, f"Select at least one {self.noun} and an action.")
+            return redirect(self.success_url)
+
+        result = moderate(self.model, form.cleaned_data['ids'], form.status, request.user)
+        if wants_json:
+            return JsonResponse({'action': form.cleaned_data['action'], **result._asdict()})
+
+        verb = 'Accepted' if form.status == 'A' else 'Denied'
+        message = f"{verb} {result.changed} {self.noun}{pluralize(result.changed)}."
+        if result.unchanged:
+            message += f" {result.unchanged} already had that status."
+        if result.missing:
+            message += f" {result.missing} no longer exist."
+        messages.success(request, message)
+        return redirect(self.success_url)
+
+    def get(self, request):
+        return redirect(self.success_url)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class BulkModerateVolunteersView(BulkModerationView):
+    model = VolunteerRequest
+    noun = 'request'
+    success_url = 'volunteer_requests'
+
+
 # # ---------------------------
 # # Suggestions & Issues
 # # ---------------------------
@@ -246,12 +425,18 @@ class DenyVolunteerView(View):
 #     success_url = reverse_lazy('suggestion')
 
 
-class ReportIssueView(CreateView):
+class ReportIssueView(RateLimitMixin, CreateView):
+    ratelimit_scope = 'report_issue'
     model = ReportIssue
     form_class = ReportIssueForm
     template_name = 'greentech/report_issue.html'
     success_url = reverse_lazy('report_issue')
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        enqueue(notify_staff, f"Issue reported by {self.object.name}", self.object.issue)
+        return response
+
 
 # ---------------------------
 # Dashboard & Users
@@ -262,21 +447,13 @@ class DashboardView(TemplateView):
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        ctx.update({
-            'total_posts': GreenPost.objects.count(),
-            'total_contacts': ContactMessage.objects.count(),
-            'total_feedbacks': Feedback.objects.count(),
-            'total_volunteers': VolunteerRequest.objects.count(),
-            'total_suggestions': Suggestion.objects.count(),
-            'total_issues': ReportIssue.objects.count(),
-            'total_events': Event.objects.count(),
-            'total_users': User.objects.count(),
-        })
+        counts = get_counts()
+        ctx.update({f'total_{name}': value for name, value in counts.items()})
         return ctx
 
 
 @method_decorator(staff_member_required, name='dispatch')
-class UserListView(ListView):
+class UserListView(KeysetPaginationMixin, ListView):
     model = User
     template_name = 'greentech/user_list.html'
     context_object_name = 'users'
@@ -296,31 +473,130 @@ class DeleteUserView(DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
-class EventListView(ListView):
+class EventListView(CachedPageMixin, KeysetPaginationMixin, ListView):
+    """
+    Events in one date window at a time: upcoming (the default), this
+    month (``?when=month``) or a year's archive (``?year=2024``). Each is a
+    range on the indexed date column, paginated by cursor.
+    """
     model = Event
     template_name = 'greentech/event_list.html'
     context_object_name = 'events'
-    ordering = ['-date']
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        user = self.request.user
+    paginate_by = 20
+    cache_tags = ['events']
+
+    def get_window(self):
+        """Return (title, filter, ordering) for the requested window."""
+        today = timezone.localdate()
+        year = self.request.GET.get('year')
+        if year is not None:
+            if not year.isdigit() or not 1 <= int(year) <= 9998:
+                raise Http404("Invalid year.")
+            return f"Events in {year}", Q(date__year=int(year)), ['-date', '-pk']
+        when = self.request.GET.get('when', 'upcoming')
+        if when == 'upcoming':
+            return "Upcoming Events", Q(date__gte=today), ['date', 'pk']
+        if when == 'month':
+            first = today.replace(day=1)
+            following = (first + datetime.timedelta(days=32)).replace(day=1)
+            return f"Events in {first:%B %Y}", Q(date__gte=first, date__lt=following), ['date', 'pk']
+        raise Http404("Unknown event window.")
+
+    def get_ordering(self):
+        return self.window[2]
+
+    def get_queryset(self, user=None):
+        queryset = super().get_queryset().filter(self.window[1])
+        if user is not None and user.is_authenticated:
+            # The user's own application status per event, in the same query.
+            application = VolunteerApplication.objects.filter(event=OuterRef('pk'), user=user)
+            queryset = queryset.annotate(application_status=Subquery(application.values('status')[:1]))
+        return queryset
+
+    async def get(self, request, *args, **kwargs):
+        self.window = self.get_window()
+        user = await aget_user(request)
+        _, page, self.object_list, _ = await self.apaginate_queryset(self.get_queryset(user), self.paginate_by)
+        volunteer_status = None
         if user.is_authenticated:
-            user_applications = {
-                app.event_id: app.status
-                for app in VolunteerApplication.objects.filter(user=user)
-            }
-            context['user_applications'] = user_applications
-        else:
-            context['user_applications'] = {}
-        return context
+            volunteer_status = await (
+                VolunteerRequest.objects.filter(user=user).values_list('status', flat=True).afirst()
+            )
+        first = (await Event.objects.aaggregate(first=Min('date')))['first']
+        this_year = timezone.localdate().year
+        return self.render_to_response({
+            'view': self,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': self.object_list,
+            'events': self.object_list,
+            'window_title': self.window[0],
+            'when': request.GET.get('when', 'upcoming') if 'year' not in request.GET else None,
+            'year': request.GET.get('year'),
+            'archive_years': range(this_year, min(first.year, this_year) - 1, -1) if first else [],
+            'volunteer_status': volunteer_status,
+        })
+
+
+class EventCalendarView(View):
+    """iCalendar feed for calendar apps, answered with a 304 when unchanged."""
+
+    def get(self, request):
+        versions = ical.feed_versions()
+        etag = ical.feed_etag(versions)
+        last_modified = max((updated_at for _, updated_at in versions), default=None)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = HttpResponse(ical.build_feed(versions), content_type=ical.CONTENT_TYPE)
+            response['Content-Disposition'] = 'inline; filename="greentech-events.ics"'
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, public=True, max_age=ical.MAX_AGE)
+        return response
 
 
-class EventDetailView(DetailView):
+@method_decorator(staff_member_required, name='dispatch')
+class AdminEventListView(KeysetPaginationMixin, ListView):
+    model = Event
+    template_name = 'greentech/admin_event_list.html'
+    context_object_name = 'events'
+    ordering = ['-date']
+    paginate_by = 10
+
+    def get_queryset(self):
+        # Applications come from one prefetch query and the per-status
+        # counts from one aggregate, however many events are listed.
+        applications = VolunteerApplication.objects.order_by('created_at')
+        return super().get_queryset().prefetch_related(
+            Prefetch('applications', queryset=applications)
+        ).annotate(
+            pending_count=Count('applications', filter=Q(applications__status='P')),
+            accepted_count=Count('applications', filter=Q(applications__status='A')),
+            denied_count=Count('applications', filter=Q(applications__status='D')),
+        )
+
+
+class EventDetailView(CachedPageMixin, ConditionalGetMixin, DetailView):
     model = Event
     template_name = 'greentech/event_detail.html'
     context_object_name = 'event'
 
+    def get_cache_tags(self):
+        return [f"event:{self.kwargs['pk']}"]
+
+    async def aget_validators(self):
+        self.object = await self.get_queryset().filter(pk=self.kwargs['pk']).afirst()
+        if self.object is None:
+            return None
+        return self.object.updated_at.isoformat(), self.object.updated_at
+
+    async def get(self, request, *args, **kwargs):
+        if getattr(self, 'object', None) is None:
+            self.object = await aget_object_or_404(self.get_queryset(), pk=kwargs['pk'])
+        return self.render_to_response(self.get_context_data(object=self.object))
+
 
 class AddEventView(CreateView):
     model = Event
@@ -370,19 +646,36 @@ class VolunteerApplicationView(LoginRequiredMixin, CreateView):
             context['event'] = get_object_or_404(Event, pk=event_id)
         return context
 
+    def already_applied(self):
+        messages.info(self.request, "You have already applied for this event.")
+        return redirect('event_list')
+
     def form_valid(self, form):
+        event = form.cleaned_data['event']
+        if VolunteerApplication.objects.filter(user=self.request.user, event=event).exists():
+            return self.already_applied()
         form.instance.user = self.request.user
         form.instance.name = self.request.user.get_full_name() or self.request.user.username
         form.instance.email = self.request.user.email
+        try:
+            with transaction.atomic():
+                response = super().form_valid(form)
+        except IntegrityError:
+            # A concurrent submission for the same event got in first
+            return self.already_applied()
+        app = self.object
+        enqueue(
+            notify_staff, f"New volunteer application for {app.event.title}",
+            f"{app.name} <{app.email}> applied:\n\n{app.motivation}",
+        )
         messages.success(self.request, "Application submitted successfully.")
-        return super().form_valid(form)
+        return response
 
 @method_decorator(staff_member_required, name='dispatch')
 class AcceptEventVolunteerView(View):
     def post(self, request, pk):
-        app = VolunteerApplication.objects.get(pk=pk)
-        app.status = 'A'
-        app.save()
+        app = get_object_or_404(VolunteerApplication.objects.select_related('event'), pk=pk)
+        moderate(VolunteerApplication, [app.pk], 'A', request.user)
         messages.success(request, f"Accepted volunteer application from {app.name} for {app.event.title}.")
         return redirect('admin_event_list')
 
@@ -390,19 +683,30 @@ class AcceptEventVolunteerView(View):
 @method_decorator(staff_member_required, name='dispatch')
 class DenyEventVolunteerView(View):
     def post(self, request, pk):
-        app = VolunteerApplication.objects.get(pk=pk)
-        app.status = 'D'
-        app.save()
+        app = get_object_or_404(VolunteerApplication.objects.select_related('event'), pk=pk)
+        moderate(VolunteerApplication, [app.pk], 'D', request.user)
         messages.warning(request, f"Denied volunteer application from {app.name} for {app.event.title}.")
         return redirect('admin_event_list')
 
+
 @method_decorator(staff_member_required, name='dispatch')
-class FeedbackListView(ListView):
+class BulkModerateEventVolunteersView(BulkModerationView):
+    model = VolunteerApplication
+    noun = 'application'
+    success_url = 'admin_event_list'
+
+@method_decorator(staff_member_required, name='dispatch')
+class FeedbackListView(KeysetPaginationMixin, ListView):
     model = Feedback
     template_name = 'greentech/feedback_list.html'
     context_object_name = 'feedbacks'
     ordering = ['-created_at']
 
+    def get_queryset(self):
+        return super().get_queryset().select_related('user', 'post').only(
+            'feedback', 'created_at', 'user__username', 'post__title',
+        )
+
 @method_decorator(staff_member_required, name='dispatch')
 class DeleteFeedbackView(DeleteView):
     model = Feedback
@@ -412,4 +716,58 @@ class DeleteFeedbackView(DeleteView):
     def delete(self, request, *args, **kwargs):
         feedback = self.get_object()
         messages.success(request, f"Feedback by {feedback.user.username} deleted.")
-        return super().delete(request, *args, **kwargs)
\ No newline at end of file
+        return super().delete(request, *args, **kwargs)
+
+
+# ---------------------------
+# JSON API
+# ---------------------------
+class APIView(CachedPageMixin, View):
+    """Read-only JSON endpoints; see greentech/api.py."""
+    resource_name = None
+
+    @property
+    def resource(self):
+        return RESOURCES[self.resource_name]
+
+    def get_cache_tags(self):
+        return list(self.resource.cache_tags)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            fields = self.resource.parse_fields(request.GET.get('fields'))
+            data = self.get_data(request, fields, **kwargs)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        except Http404 as e:
+            return error_response(str(e) or "Not found.", 404)
+        return json_response(request, data)
+
+
+class APIListView(APIView):
+    def get_data(self, request, fields):
+        resource = self.resource
+        queryset = resource.filter(resource.queryset(fields), request.GET)
+        page = keyset_paginate(
+            queryset, resource.ordering, parse_limit(request.GET.get('limit')), request.GET.get('cursor'),
+        )
+        return {
+            'results': [resource.serialize(obj, fields) for obj in page.object_list],
+            'next': self.page_url(request, page.next_cursor),
+            'previous': self.page_url(request, page.previous_cursor),
+        }
+
+    def page_url(self, request, cursor):
+        if cursor is None:
+            return None
+        params = request.GET.copy()
+        params['cursor'] = cursor
+        return f"{request.path}?{params.urlencode()}"
+
+
+class APIDetailView(APIView):
+    def get_data(self, request, fields, pk):
+        obj = self.resource.queryset(fields).filter(pk=pk).first()
+        if obj is None:
+            raise Http404(f"No {self.resource_name} item with id {pk}.")
+        return self.resource.serialize(obj, fields)
@@ -0,0 +1,127 @@
+"""
+Page view counters that do not write to the database on every view.
+
+``record_visit`` only increments a number in the cache. At most once per
+``GREENTECH_VISIT_FLUSH_INTERVAL`` seconds per process, the request that
+happens to come along adds the buffered views to the page's SiteCounter
+row in a single UPDATE. The running total is cached too, so showing it
+costs no query either.
+
+With the default local-memory cache every process keeps its own buffer,
+and views not yet flushed are lost when a process exits; with Redis the
+buffer is shared. Either way the totals are approximate by design.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SiteCounter
+
+PENDING_PREFIX = 'greentech:visits:pending:'
+TOTAL_PREFIX = 'greentech:visits:total:'
+FLUSH_PREFIX = 'greentech:visits:flushed:'
+STARTED_PREFIX = 'greentech:visits:started:'
+
+
+def counter_name(page):
+    return f'visits_{page}'
+
+
+def _flush_interval():
+    return getattr(settings, 'GREENTECH_VISIT_FLUSH_INTERVAL', 60)
+
+
+def _increment(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Missing key; add() so a concurrent first increment is not lost.
+        if cache.add(key, delta, None):
+            return delta
+        return cache.incr(key, delta)
+
+
+async def _aincrement(key, delta=1):
+    try:
+        return await cache.aincr(key, delta)
+    except ValueError:
+        if await cache.aadd(key, delta, None):
+            return delta
+        return await cache.aincr(key, delta)
+
+
+def record_visit(page):
+    """Count one view of ``page`` and return the approximate total."""
+    _increment(PENDING_PREFIX + page)
+    # The first request to find the flush marker gone flushes; the very
+    # first one only starts the clock, as there is nothing worth writing.
+    if (cache.add(FLUSH_PREFIX + page, True, _flush_interval())
+            and not cache.add(STARTED_PREFIX + page, True, None)):
+        flush_visits(page)
+    return get_visits(page)
+
+
+async def arecord_visit(page):
+    await _aincrement(PENDING_PREFIX + page)
+    if (await cache.aadd(FLUSH_PREFIX + page, True, _flush_interval())
+            and not await cache.aadd(STARTED_PREFIX + page, True, None)):
+        await aflush_visits(page)
+    return await aget_visits(page)
+
+
+def flush_visits(page):
+    """Move the buffered views of ``page`` into its SiteCounter row."""
+    pending = cache.get(PENDING_PREFIX + page) or 0
+    if not pending:
+        return 0
+    # Subtract rather than reset, keeping views counted meanwhile.
+    cache.decr(PENDING_PREFIX + page, pending)
+    name = counter_name(page)
+    updated = SiteCounter.objects.filter(name=name).update(
+        value=F('value') + pending, updated_at=timezone.now()
+    )
+    if not updated:
+        SiteCounter.objects.create(name=name, value=pending)
+    cache.delete(TOTAL_PREFIX + page)
+    return pending
+
+
+async def aflush_visits(page):
+    pending = await cache.aget(PENDING_PREFIX + page) or 0
+    if not pending:
+        return 0
+    await cache.adecr(PENDING_PREFIX + page, pending)
+    name = counter_name(page)
+    updated = await SiteCounter.objects.filter(name=name).aupdate(
+        value=F('value') + pending, updated_at=timezone.now()
+    )
+    if not updated:
+        await SiteCounter.objects.acreate(name=name, value=pending)
+    await cache.adelete(TOTAL_PREFIX + page)
+    return pending
+
+
+def get_visits(page):
+    """Flushed total plus views still buffered."""
+    found = cache.get_many([TOTAL_PREFIX + page, PENDING_PREFIX + page])
+    total = found.get(TOTAL_PREFIX + page)
+    if total is None:
+        total = (
+            SiteCounter.objects.filter(name=counter_name(page))
+            .values_list('value', flat=True).first()
+        ) or 0
+        cache.set(TOTAL_PREFIX + page, total, None)
+    return total + (found.get(PENDING_PREFIX + page) or 0)
+
+
+async def aget_visits(page):
+    found = await cache.aget_many([TOTAL_PREFIX + page, PENDING_PREFIX + page])
+    total = found.get(TOTAL_PREFIX + page)
+    if total is None:
+        total = await (
+            SiteCounter.objects.filter(name=counter_name(page))
+            .values_list('value', flat=True).afirst()
+        ) or 0
+        await cache.aset(TOTAL_PREFIX + page, total, None)
+    return total + (found.get(PENDING_PREFIX + page) or 0)